@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from core.settings import settings
+
+T = TypeVar("T")
+
+# Bounded pool for the synchronous retrieval pipeline (DB, embeddings, BM25, rerank).
+# Keep QUERY_WORKERS at or below the DB pool size so workers do not queue on connections.
+_query_executor = ThreadPoolExecutor(max_workers=settings.query_workers, thread_name_prefix="query")
+
+
+async def run_in_query_pool(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run `fn` on the query pool without blocking the event loop; keeps contextvars (request_id)."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_query_executor, partial(ctx.run, fn, *args, **kwargs))
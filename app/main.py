@@ -1,17 +1,21 @@
 from __future__ import annotations
 
 import logging
-from typing import Callable
+from time import perf_counter
+from typing import Awaitable, Callable
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from prometheus_fastapi_instrumentator import Instrumentator
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from core.logging import configure_json_logging, new_request_id, request_id_ctx
 from core.settings import settings
-from core.metrics import init_counters
+from core.metrics import StageTimings, init_counters, init_pool_metrics, stage_timings_ctx
 from core import models as core_models
+from core.jobs import start_workers, stop_workers
 
 from app.routers import ingest, query, documents, health
+from db.base import engine
 
 
 if settings.json_logs:
@@ -21,6 +25,54 @@ else:
 
 app = FastAPI(title="RAG Core", version="0.1.0")
 
+# Multipart boundaries and part headers on top of the file bytes
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _upload_limit(path: str) -> tuple[int, str] | None:
+    """Maximum request body (bytes) and 413 detail for upload routes; None if unlimited."""
+    if path == "/ingest" or path.startswith("/documents/"):
+        mb = settings.max_upload_mb
+        return mb * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES, f"File too large. Max {mb}MB"
+    if path == "/ingest/bulk":
+        mb = settings.bulk_max_upload_mb
+        return mb * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES, f"Bulk upload too large. Max {mb}MB"
+    return None
+
+
+class UploadSizeLimit:
+    """
+    Counts upload body bytes as they are received and answers 413 once past the route's
+    limit, so an oversized body (including chunked ones without Content-Length) is never
+    spooled in full.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = _upload_limit(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        max_bytes, detail = limit
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # Raised inside body parsing; the exception handler turns it into a 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(UploadSizeLimit)
+
 
 @app.middleware("http")
 async def add_request_id(request: Request, call_next: Callable):
@@ -34,6 +86,26 @@ async def add_request_id(request: Request, call_next: Callable):
         request_id_ctx.reset(token)
 
 
+@app.middleware("http")
+async def add_server_timing(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    if not settings.server_timing:
+        return await call_next(request)
+    timings = StageTimings()
+    token = stage_timings_ctx.set(timings)
+    t0 = perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        stage_timings_ctx.reset(token)
+    # Streaming responses only carry the stages finished before the headers were sent
+    entries = [f"{stage};dur={s * 1000:.1f}" for stage, s in timings.durations.items()]
+    entries.append(f"total;dur={(perf_counter() - t0) * 1000:.1f}")
+    response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
 app.include_router(ingest.router)
 app.include_router(query.router)
 app.include_router(documents.router)
@@ -45,8 +117,18 @@ async def startup_event() -> None:
     # Metrics
     init_counters(settings.enable_metrics)
     if settings.enable_metrics:
+        init_pool_metrics(engine.pool)
         Instrumentator().instrument(app).expose(app, include_in_schema=False, endpoint="/metrics")
 
     # Models warmup in background
     if settings.warmup_models:
         core_models.warmup_async()
+
+    # Ingest job workers
+    if settings.ingest_workers > 0:
+        start_workers(settings.ingest_workers)
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    stop_workers()
@@ -1,43 +1,80 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import uuid
 from datetime import datetime
+from typing import Any, Dict
 
-from fastapi import APIRouter, Query
-from sqlalchemy import func, select
+from fastapi import APIRouter, File, HTTPException, Query, Response, UploadFile
+from sqlalchemy import select, tuple_
+from starlette.concurrency import run_in_threadpool
 
 from app.schemas import DocumentItem
+from core.ingestion import (
+    DocumentConflict,
+    DocumentNotFound,
+    ParseError,
+    UnsupportedFileType,
+    delete_document,
+    detect_kind,
+    update_document,
+)
+from core.settings import settings
 from db.base import SessionLocal
-from db.models import Chunk, Document
+from db.models import Document
 
 
 router = APIRouter(prefix="", tags=["documents"])
 
 
+def encode_cursor(created_at: datetime, doc_id: uuid.UUID) -> str:
+    """Opaque keyset cursor: position after the document (created_at, id)."""
+    raw = f"{created_at.isoformat()}|{doc_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, doc_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(doc_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
 @router.get("/documents")
 async def list_documents(
+    response: Response,
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+    offset: int = Query(0, ge=0, description="Deprecated: scans skipped rows; use cursor"),
     q: str | None = Query(None, description="Filter by filename substring"),
 ) -> list[DocumentItem]:
+    # Newest first; id breaks created_at ties so the keyset order is total
+    query = select(
+        Document.id,
+        Document.filename,
+        Document.created_at,
+        Document.meta,
+        Document.chunk_count,
+    ).order_by(Document.created_at.desc(), Document.id.desc())
+    if cursor:
+        if offset:
+            raise HTTPException(status_code=400, detail="Use either cursor or offset")
+        query = query.where(tuple_(Document.created_at, Document.id) < decode_cursor(cursor))
+    if q:
+        # Case-insensitive substring match (trigram index)
+        query = query.where(Document.filename.ilike(f"%{q}%"))
+    # One extra row tells whether another page exists
+    query = query.limit(limit + 1).offset(offset)
     with SessionLocal() as session:
-        query = (
-            select(
-                Document.id,
-                Document.filename,
-                Document.created_at,
-                Document.meta,
-                func.count(Chunk.id).label("chunks"),
-            )
-            .join(Chunk, Chunk.document_id == Document.id, isouter=True)
-            .group_by(Document.id)
-            .order_by(Document.created_at.desc())
-        )
-        if q:
-            # Case-insensitive substring match
-            query = query.where(Document.filename.ilike(f"%{q}%"))
-        query = query.limit(limit).offset(offset)
         rows = session.execute(query).all()
 
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+
     items: list[DocumentItem] = []
     for r in rows:
         items.append(
@@ -45,8 +82,50 @@ async def list_documents(
                 id=str(r.id),
                 filename=r.filename,
                 created_at=(r.created_at.isoformat() if isinstance(r.created_at, datetime) else str(r.created_at)),
-                chunks=int(r.chunks),
+                chunks=r.chunk_count,
                 meta=r.meta,
             )
         )
     return items
+
+
+def _document_id(doc_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(doc_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+
+@router.put("/documents/{doc_id}")
+async def replace_document(doc_id: str, file: UploadFile = File(...)) -> Dict[str, Any]:
+    """
+    Replace a document's content in place. Only chunks whose text changed are embedded;
+    returns {doc_id, stats} with unchanged/added/removed chunk counts.
+    """
+    did = _document_id(doc_id)
+    raw = await file.read()
+    if len(raw) > settings.max_upload_mb * 1024 * 1024:
+        raise HTTPException(
+            status_code=413, detail=f"File too large. Max {settings.max_upload_mb}MB"
+        )
+    try:
+        kind = detect_kind(file.filename, file.content_type)
+    except UnsupportedFileType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    sha256 = hashlib.sha256(raw).hexdigest()
+    try:
+        return await run_in_threadpool(update_document, did, raw, file.filename, kind, sha256)
+    except DocumentNotFound:
+        raise HTTPException(status_code=404, detail="Document not found")
+    except DocumentConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ParseError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/documents/{doc_id}", status_code=204)
+async def remove_document(doc_id: str) -> Response:
+    """Delete a document with its chunks, vectors and BM25 postings."""
+    if not await run_in_threadpool(delete_document, _document_id(doc_id)):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return Response(status_code=204)
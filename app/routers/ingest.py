@@ -1,34 +1,45 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
-import io
 import logging
 import os
-from typing import Any, Dict, List
-
-from fastapi import APIRouter, File, HTTPException, UploadFile, Request
-from sqlalchemy import func, select
-
-from core.chunking import chunk_pages
-from core.parsing import parse_pdf, parse_txt, parse_docx
-from core.vectorstore import add_texts
+import time
+from functools import partial
+from typing import Any, BinaryIO, Dict, List
+from uuid import UUID
+
+from fastapi import APIRouter, File, HTTPException, Query, Request, Response, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas import IngestJobStatus
+from core.ingestion import (
+    UnsupportedFileType,
+    UploadItem,
+    UploadTooLarge,
+    detect_kind,
+    expand_archive,
+    find_duplicate,
+    ingest_many,
+    is_archive,
+)
+from core.jobs import TERMINAL_STATUSES, claim_job, enqueue_ingest, get_job, run_job
+from core.settings import settings
 from db.base import SessionLocal
-from db.models import Chunk, Document
-
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="", tags=["ingest"])
 
-
-ALLOWED_CONTENT_TYPES = {
-    "application/pdf": ".pdf",
-    "text/plain": ".txt",
-    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
-}
+HASH_CHUNK_BYTES = 1024 * 1024
 
 
 @router.post("/ingest")
-async def ingest(request: Request, file: UploadFile = File(...)):
+async def ingest(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    wait: bool = Query(False, description="Process inline and return {doc_id, stats}"),
+):
     # Validate content length (header-based)
     try:
         cl = int(request.headers.get("content-length", "0"))
@@ -36,96 +47,146 @@ async def ingest(request: Request, file: UploadFile = File(...)):
         cl = 0
     max_bytes = settings.max_upload_mb * 1024 * 1024
     if cl and cl > max_bytes:
-        raise HTTPException(status_code=413, detail=f"File too large. Max {settings.max_upload_mb}MB")
+        raise HTTPException(
+            status_code=413, detail=f"File too large. Max {settings.max_upload_mb}MB"
+        )
     filename = file.filename
-    raw = await file.read()
-    if len(raw) > max_bytes:
-        raise HTTPException(status_code=413, detail=f"File too large. Max {settings.max_upload_mb}MB")
-    size = len(raw)
-    sha256 = hashlib.sha256(raw).hexdigest()
-
-    # Idempotency: (filename, size, hash)
-    with SessionLocal() as session:
-        existing = session.execute(
-            select(Document).where(
-                func.coalesce(Document.meta["sha256"].astext, "") == sha256,
-            )
-        ).scalars().first()
-        if existing:
-            chunks_count = session.execute(
-                select(func.count()).select_from(Chunk).where(Chunk.document_id == existing.id)
-            ).scalar_one()
-            return {"doc_id": str(existing.id), "stats": {"chunks": chunks_count, "tokens": None}}
-
-    # Parse
-    content_type = file.content_type or ""
-    ext = os.path.splitext(filename or "")[1].lower()
-    pages: List[Dict[str, Any]]
+    # Starlette has spooled the file part to a temp file by now (UploadSizeLimit capped the
+    # body while it streamed in); hashing happens in a second pass over that file because
+    # the middleware only sees multipart framing, not the file's own bytes
     try:
-        if ext == ".pdf" or content_type == "application/pdf":
-            pages = parse_pdf(raw)
-        elif ext in (".txt", "") or content_type.startswith("text/"):
-            pages = parse_txt(raw.decode("utf-8", errors="ignore"))
-        elif ext in (".docx",) or (
-            content_type
-            == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        ):
-            pages = parse_docx(raw)
-        else:
-            # Strict content-type validation
-            if content_type and content_type not in ALLOWED_CONTENT_TYPES:
-                raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
-            raise HTTPException(status_code=415, detail="Unsupported file type")
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception("Parsing failed")
-        raise HTTPException(status_code=400, detail=f"Parsing failed: {e}")
-
-    chunks = chunk_pages(pages)
-    approx_tokens = sum(len((c["content"] or "").split()) for c in chunks)
-
-    # Persist
-    from uuid import uuid4
-
-    with SessionLocal() as session:
-        doc = Document(
-            id=uuid4(),
-            filename=filename,
-            meta={"sha256": sha256, "size": size},
+        sha256 = await _hash_upload(file, max_bytes)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413, detail=f"File too large. Max {settings.max_upload_mb}MB"
         )
-        session.add(doc)
-        session.flush()
-
-        chunk_rows: List[Chunk] = []
-        for c in chunks:
-            chunk_rows.append(
-                Chunk(
-                    id=uuid4(),
-                    document_id=doc.id,
-                    content=c["content"],
-                    page=c.get("page"),
-                    meta=c.get("meta"),
+
+    try:
+        kind = detect_kind(filename, file.content_type)
+    except UnsupportedFileType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    def _submit() -> Dict[str, Any]:
+        # Idempotency: same content hash returns the existing document
+        with SessionLocal() as session:
+            existing = find_duplicate(session, sha256)
+            if existing:
+                return existing
+            # Only new uploads are read into memory, to be stored with the job
+            file.file.seek(0)
+            job_id = enqueue_ingest(
+                session, filename=filename, kind=kind, sha256=sha256, payload=file.file.read()
+            )
+        return {"job_id": str(job_id), "status": "queued", "status_url": f"/ingest/jobs/{job_id}"}
+
+    submitted = await run_in_threadpool(_submit)
+    if "doc_id" in submitted:
+        return submitted
+    if not wait:
+        response.status_code = 202
+        return submitted
+
+    job = await _wait_for_job(UUID(submitted["job_id"]))
+    if job["status"] == "succeeded":
+        return {"doc_id": job["doc_id"], "stats": job["stats"]}
+    if job["status"] == "failed":
+        raise HTTPException(status_code=400, detail=job["error"])
+    # Retry scheduled or still running elsewhere: hand back the job to poll
+    response.status_code = 202
+    return job
+
+
+async def _hash_upload(file: UploadFile, max_bytes: int) -> str:
+    """
+    sha256 hex of a spooled upload, read back in chunks; raises UploadTooLarge past
+    `max_bytes`. Memory stays at one chunk, but the file is read from disk once more.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(HASH_CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"{file.filename} exceeds {max_bytes} bytes")
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _spooled_size(fh: BinaryIO) -> int:
+    fh.seek(0, os.SEEK_END)
+    size = fh.tell()
+    fh.seek(0)
+    return size
+
+
+def _read_spooled(fh: BinaryIO) -> bytes:
+    fh.seek(0)
+    return fh.read()
+
+
+async def _wait_for_job(job_id: UUID) -> Dict[str, Any]:
+    # Run the attempt here unless a worker already claimed it, then poll until terminal
+    if await run_in_threadpool(claim_job, job_id):
+        await run_in_threadpool(run_job, job_id)
+    deadline = time.monotonic() + settings.ingest_wait_timeout_seconds
+    while True:
+        job = await run_in_threadpool(get_job, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job["status"] in TERMINAL_STATUSES or job["status"] == "queued":
+            return job
+        if time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(0.25)
+
+
+@router.post("/ingest/bulk")
+async def ingest_bulk(files: List[UploadFile] = File(...)) -> Dict[str, Any]:
+    """Ingest many files and/or zip/tar archives in one request; reports per-file results."""
+    max_bytes = settings.max_upload_mb * 1024 * 1024
+    max_total = settings.bulk_max_upload_mb * 1024 * 1024
+    items: List[UploadItem] = []
+    total = 0
+    for f in files:
+        # Uploads stay in their spooled temp files; ingest_many reads one file at a time
+        size = await run_in_threadpool(_spooled_size, f.file)
+        total += size
+        if total > max_total:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Bulk upload too large. Max {settings.bulk_max_upload_mb}MB",
+            )
+        if is_archive(f.filename):
+            try:
+                # Listing a compressed tar decompresses it; keep that off the event loop
+                members = await run_in_threadpool(
+                    expand_archive, f.filename, f.file, max_bytes, max_total
                 )
+                items.extend(members)
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Invalid archive {f.filename}: {e}")
+        elif size > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"{f.filename} too large. Max {settings.max_upload_mb}MB per file",
             )
-        session.add_all(chunk_rows)
-        session.commit()
-
-    # Store vectors via PGVector
-    texts = [c["content"] for c in chunks]
-    metas = [
-        {
-            **(c.get("meta") or {}),
-            "doc_id": str(doc.id),
-            "page": c.get("page"),
-            "source": (c.get("meta") or {}).get("source"),
-        }
-        for c in chunks
-    ]
-    try:
-        add_texts(texts, metas)
-    except Exception:
-        logger.exception("Failed to add to vectorstore")
-        # best-effort: keep DB state consistent even if vectorstore fails
+        else:
+            items.append((f.filename, partial(_read_spooled, f.file), f.content_type))
+        if len(items) > settings.bulk_max_files:
+            raise HTTPException(
+                status_code=413, detail=f"Too many files. Max {settings.bulk_max_files}"
+            )
+    return await run_in_threadpool(ingest_many, items)
+
 
-    return {"doc_id": str(doc.id), "stats": {"chunks": len(chunks), "tokens": approx_tokens}}
+@router.get("/ingest/jobs/{job_id}", response_model=IngestJobStatus)
+async def ingest_job_status(job_id: str) -> IngestJobStatus:
+    try:
+        jid = UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = await run_in_threadpool(get_job, jid)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IngestJobStatus(**job)
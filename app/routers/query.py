@@ -1,16 +1,27 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+import json
+from typing import Any, AsyncIterator, Dict, List
 
-from app.schemas import QueryRequest, QueryResponse, QueryResult
-from core.retrieval import retrieve
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
+from app.concurrency import run_in_query_pool
+from app.schemas import (
+    QueryBatchRequest,
+    QueryBatchResponse,
+    QueryRequest,
+    QueryResponse,
+    QueryResult,
+)
+from core.result_cache import lookup, retrieve_many_cached, store
+from core.retrieval import RetrievalRequest, first_pass_many, rerank_results
+from core.settings import settings
 
 router = APIRouter(prefix="", tags=["query"])
 
 
-@router.post("/query", response_model=QueryResponse)
-async def query(body: QueryRequest) -> QueryResponse:
+def _filters(body: QueryRequest) -> dict | None:
     filters = {
         k: v
         for k, v in {
@@ -20,12 +31,85 @@ async def query(body: QueryRequest) -> QueryResponse:
         }.items()
         if v is not None
     }
-    results_raw = retrieve(
+    return filters or None
+
+
+def _to_request(body: QueryRequest) -> RetrievalRequest:
+    return RetrievalRequest(
         body.query,
         top_k=body.top_k,
         rerank=body.rerank,
-        filters=filters or None,
+        filters=_filters(body),
         hybrid=body.hybrid,
+        ef_search=body.ef_search,
+        probes=body.probes,
+        fusion=body.fusion,
+    )
+
+
+@router.post("/query", response_model=QueryResponse)
+async def query(body: QueryRequest) -> QueryResponse:
+    (results_raw,) = await run_in_query_pool(
+        retrieve_many_cached, [_to_request(body)], [body.cache]
     )
     results = [QueryResult(**r) for r in results_raw]
     return QueryResponse(results=results)
+
+
+@router.post("/query/batch", response_model=QueryBatchResponse)
+async def query_batch(body: QueryBatchRequest) -> QueryBatchResponse:
+    """Many queries in one call: one embedding batch, one DB connection, results in order."""
+    if len(body.queries) > settings.query_batch_max:
+        raise HTTPException(
+            status_code=413, detail=f"Too many queries. Max {settings.query_batch_max}"
+        )
+    batches = await run_in_query_pool(
+        retrieve_many_cached,
+        [_to_request(q) for q in body.queries],
+        [q.cache for q in body.queries],
+    )
+    return QueryBatchResponse(
+        results=[QueryResponse(results=[QueryResult(**r) for r in rs]) for rs in batches]
+    )
+
+
+def _event(name: str, results: List[Dict[str, Any]], reranked: bool) -> bytes:
+    payload = {
+        "event": name,
+        "reranked": reranked,
+        "results": [QueryResult(**r).model_dump() for r in results],
+    }
+    return (json.dumps(payload) + "\n").encode()
+
+
+@router.post("/query/stream")
+async def query_stream(body: QueryRequest) -> StreamingResponse:
+    """
+    NDJSON stream. With rerank: a `first_pass` event as soon as vector/hybrid candidates
+    are ready, then a `final` event once the cross-encoder finishes or times out
+    (`reranked` false). Without rerank, or on a cache hit, only the `final` event.
+    """
+    req = _to_request(body)
+    key = None
+    if body.cache and settings.result_cache_size > 0:
+        key, cached = await run_in_query_pool(lookup, req)
+        if cached is not None:
+            first: List[bytes] = [_event("final", cached, reranked=req.rerank)]
+            return StreamingResponse(iter(first), media_type="application/x-ndjson")
+    (results,) = await run_in_query_pool(first_pass_many, [req])
+
+    async def events() -> AsyncIterator[bytes]:
+        if not req.rerank:
+            final = results[: req.top_k]
+            if key is not None:
+                store(key, final)
+            yield _event("final", final, reranked=False)
+            return
+        yield _event("first_pass", results[: req.top_k], reranked=False)
+        ok = await run_in_query_pool(rerank_results, req.query, results)
+        final = results[: req.top_k]
+        if key is not None and ok:
+            store(key, final)
+        yield _event("final", final, reranked=ok)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, List, Optional
+from typing import Any, List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class IngestResponse(BaseModel):
@@ -10,6 +10,20 @@ class IngestResponse(BaseModel):
     stats: dict
 
 
+class IngestJobStatus(BaseModel):
+    job_id: str
+    status: str
+    stage: Optional[str] = None
+    filename: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    doc_id: Optional[str] = None
+    stats: Optional[dict] = None
+    created_at: str
+    updated_at: str
+
+
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 5
@@ -18,6 +32,13 @@ class QueryRequest(BaseModel):
     source: Optional[str] = None
     section: Optional[str] = None
     hybrid: Optional[bool] = None
+    # Hybrid fusion strategy; server default HYBRID_FUSION
+    fusion: Optional[Literal["weighted", "rrf"]] = None
+    # ANN recall/latency knobs; server defaults HNSW_EF_SEARCH / IVFFLAT_PROBES
+    ef_search: Optional[int] = Field(None, ge=1, le=1000)
+    probes: Optional[int] = Field(None, ge=1, le=10000)
+    # false bypasses the result cache for this request
+    cache: bool = True
 
 
 class QueryResult(BaseModel):
@@ -27,12 +48,22 @@ class QueryResult(BaseModel):
     page: Optional[int] = None
     section: Optional[str] = None
     doc_id: Optional[str] = None
+    chunk_id: Optional[str] = None
 
 
 class QueryResponse(BaseModel):
     results: List[QueryResult]
 
 
+class QueryBatchRequest(BaseModel):
+    queries: List[QueryRequest] = Field(..., min_length=1)
+
+
+class QueryBatchResponse(BaseModel):
+    # One response per query, in request order
+    results: List[QueryResponse]
+
+
 class DocumentItem(BaseModel):
     id: str
     filename: str
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from core.settings import settings
+from db.base import engine
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_TABLE = "chunks"
+ANN_INDEX_NAME = "ix_chunks_embedding_ann"
+ANN_METHODS = ("hnsw", "ivfflat")
+
+
+def index_ddl(
+    method: str,
+    *,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    lists: Optional[int] = None,
+    concurrently: bool = False,
+) -> str:
+    """CREATE INDEX statement for a cosine-distance ANN index on the embedding column."""
+    if method not in ANN_METHODS:
+        raise ValueError(f"Unknown ANN index method: {method}")
+    if method == "hnsw":
+        opts = (
+            f"m = {int(m or settings.hnsw_m)}, "
+            f"ef_construction = {int(ef_construction or settings.hnsw_ef_construction)}"
+        )
+    else:
+        opts = f"lists = {int(lists or settings.ivfflat_lists)}"
+    conc = "CONCURRENTLY " if concurrently else ""
+    return (
+        f"CREATE INDEX {conc}IF NOT EXISTS {ANN_INDEX_NAME} ON {EMBEDDING_TABLE} "
+        f"USING {method} (embedding vector_cosine_ops) WITH ({opts})"
+    )
+
+
+def build_ann_index(
+    method: Optional[str] = None,
+    *,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    lists: Optional[int] = None,
+    replace: bool = True,
+) -> str:
+    """(Re)build the ANN index without blocking writes (CREATE INDEX CONCURRENTLY)."""
+    method = method or settings.ann_index
+    ddl = index_ddl(method, m=m, ef_construction=ef_construction, lists=lists, concurrently=True)
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if replace:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {ANN_INDEX_NAME}"))
+        conn.execute(text(ddl))
+    logger.info("ann_index_built", extra={"method": method})
+    return ddl
+
+
+def drop_ann_index() -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {ANN_INDEX_NAME}"))
+
+
+def ann_index_status() -> Dict[str, Any]:
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT indexdef, pg_relation_size(indexname::regclass) AS size_bytes "
+                "FROM pg_indexes WHERE indexname = :name"
+            ),
+            {"name": ANN_INDEX_NAME},
+        ).first()
+    if row is None:
+        return {"index": ANN_INDEX_NAME, "exists": False}
+    return {
+        "index": ANN_INDEX_NAME,
+        "exists": True,
+        "definition": row.indexdef,
+        "size_bytes": row.size_bytes,
+    }
@@ -1,18 +1,238 @@
 from __future__ import annotations
 
-from functools import lru_cache
-from typing import Iterable, List
+import math
+import threading
+from collections import Counter
+from typing import Any, Container, Dict, Iterable, List, Mapping, Optional, Tuple
 
-from rank_bm25 import BM25Okapi
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db.base import SessionLocal
+from db.copy import copy_rows
+from db.models import Bm25Posting
 
 
 def _tokenize(text: str) -> List[str]:
     return [t for t in text.lower().split() if t]
 
 
-def bm25_scores(query: str, docs: List[str]) -> List[float]:
-    tokenized_corpus = [_tokenize(d) for d in docs]
-    bm25 = BM25Okapi(tokenized_corpus)
-    scores = bm25.get_scores(_tokenize(query))
-    return list(map(float, scores))
+def term_frequencies(text: str) -> Dict[str, int]:
+    return dict(Counter(_tokenize(text)))
+
+
+class BM25Index:
+    """
+    Inverted index (postings, document frequencies, doc lengths) over chunks.
+    Scores use corpus-wide statistics; lookups are keyed by chunk id.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._total_len = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, chunk_id: object) -> bool:
+        return chunk_id in self._doc_len
+
+    def add(self, chunk_id: str, tfs: Mapping[str, int]) -> None:
+        with self._lock:
+            if chunk_id in self._doc_len:
+                self.remove(chunk_id)
+            for term, tf in tfs.items():
+                self._postings.setdefault(term, {})[chunk_id] = int(tf)
+            length = sum(tfs.values())
+            self._doc_len[chunk_id] = length
+            self._doc_terms[chunk_id] = tuple(tfs)
+            self._total_len += length
+
+    def add_text(self, chunk_id: str, text: str) -> None:
+        self.add(chunk_id, term_frequencies(text))
+
+    def remove(self, chunk_id: str) -> None:
+        with self._lock:
+            length = self._doc_len.pop(chunk_id, None)
+            if length is None:
+                return
+            self._total_len -= length
+            for term in self._doc_terms.pop(chunk_id, ()):
+                plist = self._postings.get(term)
+                if plist is None:
+                    continue
+                plist.pop(chunk_id, None)
+                if not plist:
+                    del self._postings[term]
+
+    def _idf(self, term: str) -> float:
+        n = len(self._doc_len)
+        df = len(self._postings.get(term, ()))
+        # Non-negative (Lucene-style) IDF: common terms never push scores below zero
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def _avgdl(self) -> float:
+        return (self._total_len / len(self._doc_len)) if self._doc_len else 0.0
+
+    def _term_score(self, tf: int, doc_len: int, idf: float, avgdl: float) -> float:
+        norm = self.k1 * (1 - self.b + self.b * doc_len / avgdl) if avgdl else self.k1
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+
+    def scores(self, query: str, chunk_ids: Iterable[str]) -> Dict[str, float]:
+        """Score indexed chunks by id; ids missing from the index are omitted."""
+        terms = _tokenize(query)
+        out: Dict[str, float] = {}
+        with self._lock:
+            avgdl = self._avgdl()
+            idfs = {t: self._idf(t) for t in set(terms)}
+            for cid in chunk_ids:
+                doc_len = self._doc_len.get(cid)
+                if doc_len is None:
+                    continue
+                s = 0.0
+                for t in terms:
+                    tf = self._postings.get(t, {}).get(cid)
+                    if tf:
+                        s += self._term_score(tf, doc_len, idfs[t], avgdl)
+                out[cid] = s
+        return out
+
+    def score_text(self, query: str, text: str) -> float:
+        """Score an arbitrary text against corpus-wide statistics."""
+        tfs = term_frequencies(text)
+        doc_len = sum(tfs.values())
+        with self._lock:
+            avgdl = self._avgdl() or float(doc_len)
+            s = 0.0
+            for t in _tokenize(query):
+                tf = tfs.get(t)
+                if tf:
+                    s += self._term_score(tf, doc_len, self._idf(t), avgdl)
+        return s
+
+    def rank(self, query: str, allowed: Optional[Container[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Every chunk matching a query term (restricted to `allowed` ids when given), best
+        first, accumulated from postings with corpus-wide statistics.
+        """
+        terms = _tokenize(query)
+        acc: Dict[str, float] = {}
+        with self._lock:
+            avgdl = self._avgdl()
+            for t in terms:
+                plist = self._postings.get(t)
+                if not plist:
+                    continue
+                idf = self._idf(t)
+                for cid, tf in plist.items():
+                    if allowed is not None and cid not in allowed:
+                        continue
+                    acc[cid] = acc.get(cid, 0.0) + self._term_score(
+                        tf, self._doc_len[cid], idf, avgdl
+                    )
+        return sorted(acc.items(), key=lambda x: x[1], reverse=True)
+
+    def top_n(
+        self, query: str, n: int, allowed: Optional[Container[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Top-n chunk ids over the whole corpus (or the `allowed` ids)."""
+        return self.rank(query, allowed)[:n]
+
+
+def persist_postings(
+    session: Session, chunks: Iterable[Tuple[Any, str]]
+) -> Dict[str, Dict[str, int]]:
+    """
+    Write postings for (chunk_id, text) pairs in the caller's transaction.
+    Returns {chunk_id: term frequencies} for `update_bm25_index` after commit.
+    """
+    tfs_by_chunk: Dict[str, Dict[str, int]] = {}
+    rows: List[Tuple[Any, str, int]] = []
+    for chunk_id, text in chunks:
+        tfs = term_frequencies(text)
+        tfs_by_chunk[str(chunk_id)] = tfs
+        rows.extend((chunk_id, t, tf) for t, tf in tfs.items())
+    if rows:
+        copy_rows(session, "bm25_postings", ("chunk_id", "term", "tf"), rows)
+    return tfs_by_chunk
+
+
+def load_index(session: Session) -> BM25Index:
+    index = BM25Index()
+    current: Optional[str] = None
+    tfs: Dict[str, int] = {}
+    stmt = select(Bm25Posting.chunk_id, Bm25Posting.term, Bm25Posting.tf).order_by(
+        Bm25Posting.chunk_id
+    )
+    for chunk_id, term, tf in session.execute(stmt.execution_options(yield_per=10_000)):
+        cid = str(chunk_id)
+        if cid != current:
+            if current is not None:
+                index.add(current, tfs)
+            current, tfs = cid, {}
+        tfs[term] = tf
+    if current is not None:
+        index.add(current, tfs)
+    return index
+
+
+_index: Optional[BM25Index] = None
+_load_lock = threading.Lock()
+# Guards `_index` and `_pending`. While the first load runs, committed changes are queued
+# in `_pending` and replayed over the loaded snapshot (add and remove are idempotent).
+_state_lock = threading.Lock()
+_pending: Optional[List[Tuple[str, Optional[Mapping[str, int]]]]] = None
+
+
+def get_bm25_index() -> BM25Index:
+    """Process-wide index, loaded from `bm25_postings` on first use."""
+    global _index, _pending
+    if _index is None:
+        with _load_lock:
+            if _index is None:
+                with _state_lock:
+                    _pending = []
+                try:
+                    with SessionLocal() as session:
+                        index = load_index(session)
+                    with _state_lock:
+                        for chunk_id, tfs in _pending:
+                            if tfs is None:
+                                index.remove(chunk_id)
+                            else:
+                                index.add(chunk_id, tfs)
+                        _index = index
+                finally:
+                    with _state_lock:
+                        _pending = None
+    return _index
+
+
+def _apply(changes: List[Tuple[str, Optional[Mapping[str, int]]]]) -> None:
+    with _state_lock:
+        index = _index
+        if index is None:
+            # Not loaded: a later load reads these rows; a load in progress replays them
+            if _pending is not None:
+                _pending.extend(changes)
+            return
+    for chunk_id, tfs in changes:
+        if tfs is None:
+            index.remove(chunk_id)
+        else:
+            index.add(chunk_id, tfs)
+
+
+def update_bm25_index(tfs_by_chunk: Mapping[str, Mapping[str, int]]) -> None:
+    """Apply committed postings to the in-memory index (or to a load in progress)."""
+    _apply([(str(cid), tfs) for cid, tfs in tfs_by_chunk.items()])
+
 
+def remove_from_bm25_index(chunk_ids: Iterable[str]) -> None:
+    """Drop deleted chunks from the in-memory index (or from a load in progress)."""
+    _apply([(str(cid), None) for cid in chunk_ids])
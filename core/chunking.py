@@ -1,11 +1,53 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict, Iterable, List
 
+import tiktoken
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from core.settings import settings
 
+# Encoding used both to size chunks and to count their tokens
+TOKEN_ENCODING = "gpt2"
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> tiktoken.Encoding:
+    return tiktoken.get_encoding(TOKEN_ENCODING)
+
+
+# Memoized because the splitter measures each split more than once while merging,
+# and a chunk that is a single split is then counted for free
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=16)
+def get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """One splitter per (size, overlap), sizing splits with count_tokens."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=count_tokens,
+        separators=["\n\n", "\n", " ", ""],
+    )
+
+
+def _chunk_page(
+    splitter: RecursiveCharacterTextSplitter, page: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    meta = dict(page.get("meta") or {})
+    return [
+        {
+            "content": part,
+            "page": page.get("page"),
+            "meta": {**meta, "tokens": count_tokens(part)},
+        }
+        for part in splitter.split_text(page["content"])
+    ]
+
 
 def chunk_pages(
     pages: Iterable[Dict[str, Any]],
@@ -14,23 +56,15 @@ def chunk_pages(
 ) -> List[Dict[str, Any]]:
     """
     Split pages into chunks preserving metadata.
-    Returns [{content, page, meta}]
+    Returns [{content, page, meta}]; meta["tokens"] is the chunk's exact token count.
     """
-    splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=chunk_size or settings.chunk_size,
-        chunk_overlap=chunk_overlap or settings.chunk_overlap,
-        separators=["\n\n", "\n", " ", ""],
-        disallowed_special=(),
+    splitter = get_splitter(
+        chunk_size or settings.chunk_size, chunk_overlap or settings.chunk_overlap
     )
-    chunks: List[Dict[str, Any]] = []
-    for page in pages:
-        text = page["content"]
-        page_num = page.get("page")
-        meta = dict(page.get("meta") or {})
-        for part in splitter.split_text(text):
-            chunks.append({
-                "content": part,
-                "page": page_num,
-                "meta": meta,
-            })
-    return chunks
+    return [chunk for page in pages for chunk in _chunk_page(splitter, page)]
+
+
+def chunk_tokens(chunk: Dict[str, Any]) -> int:
+    """Token count recorded at chunking time (counted now for chunks from elsewhere)."""
+    tokens = (chunk.get("meta") or {}).get("tokens")
+    return int(tokens) if tokens is not None else count_tokens(chunk["content"] or "")
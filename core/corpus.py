@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import func, select, update
+
+from core.settings import settings
+from db.base import SessionLocal
+from db.models import CorpusState
+
+# Last generation seen and when it was read; other processes' bumps are picked up
+# within RESULT_CACHE_GENERATION_REFRESH_SECONDS
+_generation: Optional[int] = None
+_generation_read_at = 0.0
+_generation_lock = threading.Lock()
+
+
+def _remember(gen: int) -> int:
+    """
+    Record `gen` as read now, unless a newer generation was recorded meanwhile (a slow
+    read finishing after a bump must not roll it back). Returns the generation kept.
+    """
+    global _generation, _generation_read_at
+    with _generation_lock:
+        if _generation is None or gen >= _generation:
+            _generation, _generation_read_at = gen, time.monotonic()
+        return _generation
+
+
+def corpus_generation() -> int:
+    with _generation_lock:
+        if (
+            _generation is not None
+            and time.monotonic() - _generation_read_at
+            < settings.result_cache_generation_refresh_seconds
+        ):
+            return _generation
+    with SessionLocal() as session:
+        gen = session.execute(select(CorpusState.generation)).scalar_one_or_none() or 0
+    return _remember(gen)
+
+
+def bump_corpus_generation() -> int:
+    """Mark cached results stale; call after ingested or deleted content becomes visible."""
+    with SessionLocal() as session:
+        gen = session.execute(
+            update(CorpusState)
+            .values(generation=CorpusState.generation + 1, updated_at=func.now())
+            .returning(CorpusState.generation)
+        ).scalar_one_or_none()
+        session.commit()
+    return _remember(gen or 0)
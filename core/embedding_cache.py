@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from core.embeddings import embedding_model_id, get_embeddings
+from core.metrics import inc_cache
+from core.settings import settings
+from db.base import SessionLocal
+from db.models import EmbeddingCache
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def prune_embedding_cache(session: Session, max_rows: int) -> int:
+    """
+    Keep at most `max_rows` cached vectors, dropping the oldest first (0 = unbounded).
+    The planner's row estimate gates the delete, so under the cap this costs one catalog read;
+    a table never analyzed (estimate -1) is treated as possibly over the cap.
+    """
+    if max_rows <= 0:
+        return 0
+    estimate = session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'embedding_cache'::regclass")
+    ).scalar_one()
+    if 0 <= estimate <= max_rows:
+        return 0
+    # Rows written in one transaction share created_at: the key breaks ties so exactly
+    # max_rows survive
+    result = session.execute(
+        text(
+            "DELETE FROM embedding_cache WHERE (created_at, content_hash, model) <= ("
+            "SELECT created_at, content_hash, model FROM embedding_cache "
+            "ORDER BY created_at DESC, content_hash DESC, model DESC "
+            "OFFSET :max_rows LIMIT 1)"
+        ),
+        {"max_rows": max_rows},
+    )
+    return int(getattr(result, "rowcount", 0) or 0)
+
+
+def embed_documents_cached(texts: Sequence[str]) -> List[List[float]]:
+    """
+    Embed chunk texts, reusing vectors stored by content hash for the current model.
+    Only texts not seen before (in the table or earlier in `texts`) reach the model.
+    """
+    if not texts:
+        return []
+    if not settings.embedding_cache_enabled:
+        return [list(v) for v in get_embeddings().embed_documents(list(texts))]
+
+    model = embedding_model_id()
+    hashes = [content_hash(t) for t in texts]
+    text_by_hash = dict(zip(hashes, texts, strict=True))
+    unique = list(text_by_hash)
+
+    # Lookup and write are separate short transactions: no connection is held while the
+    # model runs
+    with SessionLocal() as session:
+        rows: Sequence[Any] = session.execute(
+            select(EmbeddingCache.content_hash, EmbeddingCache.embedding).where(
+                EmbeddingCache.model == model,
+                EmbeddingCache.content_hash.in_(unique),
+            )
+        ).all()
+    vectors: Dict[str, List[float]] = {h: [float(x) for x in e] for h, e in rows}
+
+    misses = [h for h in unique if h not in vectors]
+    if misses:
+        embedded = get_embeddings().embed_documents([text_by_hash[h] for h in misses])
+        new_rows = []
+        for h, vec in zip(misses, embedded, strict=True):
+            vectors[h] = list(vec)
+            new_rows.append({"content_hash": h, "model": model, "embedding": vectors[h]})
+        with SessionLocal() as session:
+            # Concurrent ingests may embed the same text; first writer wins
+            session.execute(insert(EmbeddingCache).on_conflict_do_nothing(), new_rows)
+            prune_embedding_cache(session, settings.embedding_cache_max_rows)
+            session.commit()
+
+    inc_cache("chunk_embedding", hit=True, amount=len(texts) - len(misses))
+    inc_cache("chunk_embedding", hit=False, amount=len(misses))
+    return [vectors[h] for h in hashes]
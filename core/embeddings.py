@@ -1,19 +1,113 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import Any
+from typing import Dict, List, Sequence
 
 from langchain_community.embeddings import HuggingFaceBgeEmbeddings
+from langchain_community.embeddings.huggingface import (
+    DEFAULT_QUERY_BGE_INSTRUCTION_EN,
+    DEFAULT_QUERY_BGE_INSTRUCTION_ZH,
+)
+from langchain_core.embeddings import Embeddings
 
+from core.cache import TTLCache
+from core.metrics import inc_cache
 from core.settings import settings
 
+_query_cache: TTLCache[List[float]] = TTLCache(
+    maxsize=settings.query_embedding_cache_size, ttl=settings.query_embedding_cache_ttl
+)
 
-@lru_cache(maxsize=1)
-def get_embeddings() -> Any:
+
+def build_embeddings(backend: str | None = None) -> Embeddings:
+    """
+    Embeddings for EMBEDDING_BACKEND: `torch` (sentence-transformers), `onnx`, or `hash`
+    (deterministic stand-in for benchmarks and tests).
+    """
+    backend = backend or settings.embedding_backend
     model_name = settings.embedding_model
+    if backend == "onnx":
+        from core.onnx_embeddings import OnnxBgeEmbeddings
+
+        return OnnxBgeEmbeddings(
+            settings.onnx_model_dir,
+            quantize=settings.onnx_quantize,
+            threads=settings.embedding_threads,
+            batch_size=settings.embedding_batch_size,
+            query_instruction=(
+                DEFAULT_QUERY_BGE_INSTRUCTION_ZH
+                if "-zh" in model_name
+                else DEFAULT_QUERY_BGE_INSTRUCTION_EN
+            ),
+        )
+    if backend == "hash":
+        from core.hash_embeddings import HashEmbeddings
+
+        return HashEmbeddings(settings.embedding_dim)
+    if backend != "torch":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+    if settings.embedding_threads > 0:
+        import torch
+
+        torch.set_num_threads(settings.embedding_threads)
     return HuggingFaceBgeEmbeddings(
         model_name=model_name,
         model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True},
+        encode_kwargs={"normalize_embeddings": True, "batch_size": settings.embedding_batch_size},
     )
 
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> Embeddings:
+    return build_embeddings()
+
+
+def embedding_model_id() -> str:
+    """
+    Cache key for vectors of the configured model. Quantized ONNX vectors differ slightly
+    from PyTorch ones, so they are cached apart.
+    """
+    if settings.embedding_backend == "hash":
+        return f"hash-{settings.embedding_dim}"
+    if settings.embedding_backend == "onnx":
+        return f"{settings.embedding_model}#onnx{'-int8' if settings.onnx_quantize else ''}"
+    return settings.embedding_model
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.split())
+
+
+def embed_query(text: str) -> List[float]:
+    """Embed a query once per (model, normalized text) within the cache TTL."""
+    return embed_queries([text])[0]
+
+
+def embed_queries(texts: Sequence[str]) -> List[List[float]]:
+    """
+    Embed many queries with one model call for the cache misses. Queries are embedded
+    as documents with the model's query instruction prepended, which is what
+    `embed_query` does for a single text.
+    """
+    model_id = embedding_model_id()
+    normalized = [normalize_query(t) for t in texts]
+    vectors: Dict[str, List[float]] = {}
+    for q in normalized:
+        if q in vectors:
+            continue
+        cached = _query_cache.get((model_id, q))
+        inc_cache("query_embedding", hit=cached is not None)
+        if cached is not None:
+            vectors[q] = cached
+    misses = [q for q in dict.fromkeys(normalized) if q not in vectors]
+    if len(misses) == 1:
+        vectors[misses[0]] = list(get_embeddings().embed_query(misses[0]))
+    elif misses:
+        emb = get_embeddings()
+        instruction = getattr(emb, "query_instruction", "")
+        embedded = emb.embed_documents([instruction + q for q in misses])
+        for q, vec in zip(misses, embedded):
+            vectors[q] = list(vec)
+    for q in misses:
+        _query_cache.set((model_id, q), vectors[q])
+    return [vectors[q] for q in normalized]
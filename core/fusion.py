@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+FUSION_STRATEGIES = ("weighted", "rrf")
+
+Hit = Dict[str, Any]
+
+
+def _key(hit: Hit) -> str:
+    # Chunk id identifies a candidate across retrievers; text is a fallback for legacy rows
+    return str(hit.get("chunk_id") or hit["text"])
+
+
+def _normalize(scores: List[float]) -> List[float]:
+    if not scores:
+        return []
+    mn, mx = min(scores), max(scores)
+    if mx - mn < 1e-9:
+        return [0.5 for _ in scores]
+    return [(s - mn) / (mx - mn) for s in scores]
+
+
+def _merge(runs: Sequence[List[Hit]], fused: Dict[str, float]) -> List[Hit]:
+    # First occurrence wins for payload (text, page, metadata); score is replaced
+    merged: Dict[str, Hit] = {}
+    for run in runs:
+        for hit in run:
+            key = _key(hit)
+            if key not in merged:
+                merged[key] = {**hit, "score": float(fused[key])}
+    return sorted(merged.values(), key=lambda h: h["score"], reverse=True)
+
+
+def weighted_fusion(
+    runs: Sequence[List[Hit]], scores: Sequence[List[float]], weights: Sequence[float]
+) -> List[Hit]:
+    """
+    Sum of weight * min-max normalized score per run, keyed by chunk id.
+    `scores[i]` are higher-is-better values aligned with `runs[i]`; a candidate
+    missing from a run contributes 0 for it.
+    """
+    fused: Dict[str, float] = {}
+    for run, run_scores, w in zip(runs, scores, weights):
+        seen = set()
+        for hit, s in zip(run, _normalize(list(run_scores))):
+            key = _key(hit)
+            if key in seen:
+                continue
+            seen.add(key)
+            fused[key] = fused.get(key, 0.0) + w * s
+    for run in runs:
+        for hit in run:
+            fused.setdefault(_key(hit), 0.0)
+    return _merge(runs, fused)
+
+
+def rrf_fusion(
+    runs: Sequence[List[Hit]], k: int = 60, weights: Sequence[float] | None = None
+) -> List[Hit]:
+    """
+    Reciprocal rank fusion: sum of weight / (k + rank) over runs, keyed by chunk id.
+    Each run must be ordered best first; raw scores are ignored.
+    """
+    weights = weights if weights is not None else [1.0] * len(runs)
+    fused: Dict[str, float] = {}
+    for run, w in zip(runs, weights):
+        seen = set()
+        for rank, hit in enumerate(run, start=1):
+            key = _key(hit)
+            if key in seen:
+                continue
+            seen.add(key)
+            fused[key] = fused.get(key, 0.0) + w / (k + rank)
+    return _merge(runs, fused)
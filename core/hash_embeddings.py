@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+from typing import List, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _bucket(token: str, dim: int) -> tuple[int, float]:
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if (value >> 63) & 1 else -1.0
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic stand-in embedder (EMBEDDING_BACKEND=hash) for benchmarks and tests:
+    signed feature hashing of lowercased tokens, L2-normalized. Texts sharing words get
+    similar vectors, so retrieval behaves plausibly without downloading a model.
+    """
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        for token in _TOKEN.findall(text.lower()):
+            i, sign = _bucket(token, self.dim)
+            vec[i] += sign
+        norm = math.sqrt(sum(v * v for v in vec))
+        if norm == 0:
+            return vec
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class HashReranker:
+    """Stand-in for the cross-encoder (RERANK_BACKEND=hash): cosine of hashed vectors."""
+
+    def __init__(self, dim: int) -> None:
+        self._emb = HashEmbeddings(dim)
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        q = self._emb.embed_query(query)
+        return [sum(a * b for a, b in zip(q, d)) for d in self._emb.embed_documents(list(texts))]
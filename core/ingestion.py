@@ -0,0 +1,541 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import tarfile
+import zipfile
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import partial
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from uuid import UUID, uuid4
+
+from sqlalchemy import Integer, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.bm25 import persist_postings, remove_from_bm25_index, update_bm25_index
+from core.chunking import chunk_pages, chunk_tokens
+from core.corpus import bump_corpus_generation
+from core.embedding_cache import content_hash, embed_documents_cached
+from core.metrics import timed
+from core.parsing import parse_docx, parse_pdf, parse_txt
+from core.settings import settings
+from core.vectorstore import vector_literal
+from db.base import SessionLocal
+from db.copy import copy_rows
+from db.models import Chunk, Document
+
+logger = logging.getLogger(__name__)
+
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+ALLOWED_CONTENT_TYPES = {
+    "application/pdf": ".pdf",
+    "text/plain": ".txt",
+    DOCX_CONTENT_TYPE: ".docx",
+}
+
+
+# Upload bytes, or a callable reading them on demand so a bulk request holds one file at a time
+UploadPayload = Union[bytes, Callable[[], bytes]]
+UploadItem = Tuple[Optional[str], UploadPayload, Optional[str]]
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+class UnsupportedFileType(ValueError):
+    pass
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class ParseError(ValueError):
+    """Parsing failed; retrying the same bytes will not help."""
+
+
+class DocumentNotFound(LookupError):
+    pass
+
+
+class DocumentConflict(ValueError):
+    """The update collides with another document or a concurrent update of this one."""
+
+
+def detect_kind(filename: str | None, content_type: str | None) -> str:
+    """Map an upload to a parser ("pdf", "txt", "docx") or raise UnsupportedFileType."""
+    content_type = content_type or ""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext == ".pdf" or content_type == "application/pdf":
+        return "pdf"
+    if ext in (".txt", "") or content_type.startswith("text/"):
+        return "txt"
+    if ext in (".docx",) or content_type == DOCX_CONTENT_TYPE:
+        return "docx"
+    # Strict content-type validation
+    if content_type and content_type not in ALLOWED_CONTENT_TYPES:
+        raise UnsupportedFileType(f"Unsupported content type: {content_type}")
+    raise UnsupportedFileType("Unsupported file type")
+
+
+def is_archive(filename: str | None) -> bool:
+    return (filename or "").lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _payload_bytes(payload: UploadPayload) -> bytes:
+    return payload if isinstance(payload, bytes) else payload()
+
+
+def _read_tar_member(tf: tarfile.TarFile, member: tarfile.TarInfo) -> bytes:
+    fh = tf.extractfile(member)
+    return fh.read() if fh is not None else b""
+
+
+def expand_archive(
+    filename: str | None, data: bytes | IO[bytes], max_bytes: int, max_total_bytes: int
+) -> List[UploadItem]:
+    """
+    Regular files inside a zip/tar archive, each read from `data` only when its payload is
+    called. Declared member sizes are checked up front so an archive cannot expand past
+    `max_bytes` each or `max_total_bytes` overall.
+    """
+    fileobj = io.BytesIO(data) if isinstance(data, bytes) else data
+    members: List[Tuple[str, int, Callable[[], bytes]]] = []
+    if (filename or "").lower().endswith(".zip"):
+        zf = zipfile.ZipFile(fileobj)
+        for info in zf.infolist():
+            if not info.is_dir():
+                members.append((info.filename, info.file_size, partial(zf.read, info)))
+    else:
+        tf = tarfile.open(fileobj=fileobj, mode="r:*")
+        for member in tf.getmembers():
+            if member.isfile():
+                members.append((member.name, member.size, partial(_read_tar_member, tf, member)))
+
+    total = 0
+    items: List[UploadItem] = []
+    for name, size, read in members:
+        total += size
+        if size > max_bytes:
+            raise UploadTooLarge(f"{name} exceeds the per-file limit")
+        if total > max_total_bytes:
+            raise UploadTooLarge(f"{filename} expands past the bulk upload limit")
+        items.append((name, read, None))
+    return items
+
+
+def parse_document(raw: bytes, kind: str) -> List[Dict[str, Any]]:
+    try:
+        with timed("parsing"):
+            if kind == "pdf":
+                return parse_pdf(raw)
+            if kind == "docx":
+                return parse_docx(raw)
+            return parse_txt(raw.decode("utf-8", errors="ignore"))
+    except Exception as e:
+        raise ParseError(f"Parsing failed: {e}") from e
+
+
+def chunk_document(pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    with timed("chunking"):
+        return chunk_pages(pages)
+
+
+def find_duplicate(session: Session, sha256: str) -> Optional[Dict[str, Any]]:
+    """Idempotency: an already ingested upload with the same content hash."""
+    # Plain equality on meta->>'sha256' so ux_documents_sha256 (partial, non-null) serves it
+    tokens = (
+        select(func.sum(Chunk.meta["tokens"].astext.cast(Integer)))
+        .where(Chunk.document_id == Document.id)
+        .scalar_subquery()
+    )
+    existing = session.execute(
+        select(Document.id, Document.chunk_count, tokens.label("tokens"))
+        .where(Document.meta["sha256"].astext == sha256)
+        .limit(1)
+    ).first()
+    if existing is None:
+        return None
+    return {
+        "doc_id": str(existing.id),
+        "stats": {
+            "chunks": existing.chunk_count,
+            "tokens": int(existing.tokens) if existing.tokens is not None else None,
+        },
+    }
+
+
+@dataclass
+class PreparedDocument:
+    """A parsed and chunked upload with ids assigned, ready to embed and store."""
+
+    filename: str | None
+    sha256: str
+    size: int
+    chunks: List[Dict[str, Any]]
+    doc_id: UUID = field(default_factory=uuid4)
+    chunk_ids: List[UUID] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.chunk_ids:
+            self.chunk_ids = [uuid4() for _ in self.chunks]
+
+    @property
+    def tokens(self) -> int:
+        return sum(chunk_tokens(c) for c in self.chunks)
+
+
+def embed_chunks(texts: Sequence[str]) -> List[List[float]]:
+    """Embed chunk texts in batches of EMBED_BATCH_SIZE through the content-hash cache."""
+    size = max(1, settings.embed_batch_size)
+    vectors: List[List[float]] = []
+    with timed("embedding"):
+        for i in range(0, len(texts), size):
+            vectors.extend(embed_documents_cached(texts[i : i + size]))
+    return vectors
+
+
+def store_documents(
+    docs: Sequence[PreparedDocument], vectors: Sequence[List[float]]
+) -> List[PreparedDocument]:
+    """
+    COPY documents, chunks with their embeddings and BM25 postings in one transaction.
+    `vectors` follows the concatenated chunk order of `docs`. Returns the documents written:
+    one whose sha256 a concurrent ingest committed first is skipped, not an error.
+    """
+    if not docs:
+        return []
+    with timed("db_write"):
+        return _write_documents(docs, vectors)
+
+
+def _chunk_row(doc_id: UUID, chunk_id: UUID, c: Dict[str, Any]) -> Dict[str, Any]:
+    meta = c.get("meta") or {}
+    return {
+        "id": chunk_id,
+        "document_id": doc_id,
+        "content": c["content"],
+        "content_hash": content_hash(c["content"]),
+        "page": c.get("page"),
+        "meta": c.get("meta"),
+        "source": meta.get("source"),
+        "section": meta.get("section"),
+    }
+
+
+_CHUNK_COLUMNS = (
+    "id",
+    "document_id",
+    "content",
+    "content_hash",
+    "page",
+    "meta",
+    "source",
+    "section",
+)
+
+
+def _copy_chunks(
+    session: Session, docs: Sequence[PreparedDocument], vectors: Sequence[List[float]]
+) -> Dict[str, Dict[str, int]]:
+    """COPY the chunks of `docs` with their embeddings and BM25 postings; returns postings."""
+    chunk_rows = (
+        _chunk_row(d.doc_id, cid, c) for d in docs for cid, c in zip(d.chunk_ids, d.chunks)
+    )
+    copy_rows(
+        session,
+        "chunks",
+        (*_CHUNK_COLUMNS, "embedding"),
+        (
+            (*(row[col] for col in _CHUNK_COLUMNS), vector_literal(vec))
+            for row, vec in zip(chunk_rows, vectors, strict=True)
+        ),
+    )
+    return persist_postings(
+        session,
+        ((cid, c["content"]) for d in docs for cid, c in zip(d.chunk_ids, d.chunks)),
+    )
+
+
+def _copy_documents(
+    session: Session, docs: Sequence[PreparedDocument], vectors: Sequence[List[float]]
+) -> Dict[str, Dict[str, int]]:
+    copy_rows(
+        session,
+        "documents",
+        ("id", "filename", "meta", "chunk_count"),
+        ((d.doc_id, d.filename, {"sha256": d.sha256, "size": d.size}, len(d.chunks)) for d in docs),
+    )
+    return _copy_chunks(session, docs, vectors)
+
+
+def _write_documents(
+    docs: Sequence[PreparedDocument], vectors: Sequence[List[float]]
+) -> List[PreparedDocument]:
+    with SessionLocal() as session:
+        try:
+            with session.begin_nested():
+                postings = _copy_documents(session, docs, vectors)
+            written = list(docs)
+        except IntegrityError:
+            # A concurrent ingest committed one of these hashes (ux_documents_sha256): write
+            # document by document under savepoints and skip the ones that now exist
+            postings, written = {}, []
+            offset = 0
+            for doc in docs:
+                doc_vectors = vectors[offset : offset + len(doc.chunks)]
+                offset += len(doc.chunks)
+                try:
+                    with session.begin_nested():
+                        postings.update(_copy_documents(session, [doc], doc_vectors))
+                except IntegrityError:
+                    if find_duplicate(session, doc.sha256) is None:
+                        raise
+                    continue
+                written.append(doc)
+        # Nothing is visible until here: a failure leaves no document, chunk or vector behind
+        session.commit()
+    if written:
+        update_bm25_index(postings)
+        # New chunks are searchable now; cached query results are stale
+        bump_corpus_generation()
+    return written
+
+
+def _noop_stage(stage: str) -> None:
+    pass
+
+
+def ingest_bytes(
+    raw: bytes,
+    filename: str | None,
+    kind: str,
+    sha256: str,
+    on_stage: Callable[[str], None] = _noop_stage,
+) -> Dict[str, Any]:
+    """
+    Run parse -> chunk -> embed -> store for one upload.
+    Returns {doc_id, stats}; `on_stage` is called as each stage starts.
+    """
+    on_stage("parsing")
+    pages = parse_document(raw, kind)
+
+    on_stage("chunking")
+    doc = PreparedDocument(
+        filename=filename, sha256=sha256, size=len(raw), chunks=chunk_document(pages)
+    )
+
+    on_stage("embedding")
+    vectors = embed_chunks([c["content"] for c in doc.chunks])
+
+    on_stage("storing")
+    if not store_documents([doc], vectors):
+        # The same bytes were committed by a concurrent upload while this one was embedding
+        with SessionLocal() as session:
+            existing = find_duplicate(session, sha256)
+        if existing is None:
+            raise DocumentConflict("Concurrent ingest of the same content; retry")
+        return existing
+    return {
+        "doc_id": str(doc.doc_id),
+        "stats": {"chunks": len(doc.chunks), "tokens": doc.tokens},
+    }
+
+
+def find_duplicates(session: Session, hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """One query for many uploads: {sha256: {doc_id, chunks}} for already ingested hashes."""
+    unique = list(set(hashes))
+    if not unique:
+        return {}
+    sha = Document.meta["sha256"].astext
+    rows = session.execute(
+        select(Document.id, sha.label("sha256"), Document.chunk_count).where(sha.in_(unique))
+    ).all()
+    return {r.sha256: {"doc_id": str(r.id), "chunks": r.chunk_count} for r in rows}
+
+
+def ingest_many(files: Sequence[UploadItem]) -> Dict[str, Any]:
+    """
+    Bulk ingest (filename, payload, content_type) items: one dedupe query, chunks embedded
+    across files in large batches, rows written with COPY. Payloads are read one at a time
+    (once to hash, again to parse new files). Returns per-file results.
+    """
+    results: List[Dict[str, Any]] = [{"filename": name} for name, _, _ in files]
+    hashes = [hashlib.sha256(_payload_bytes(payload)).hexdigest() for _, payload, _ in files]
+    with SessionLocal() as session:
+        existing = find_duplicates(session, hashes)
+
+    prepared: List[Tuple[int, PreparedDocument]] = []
+    seen: Dict[str, int] = {}
+    for i, ((name, payload, content_type), sha256) in enumerate(zip(files, hashes, strict=True)):
+        res = results[i]
+        if sha256 in existing:
+            res.update(status="duplicate", **existing[sha256])
+            continue
+        if sha256 in seen:
+            res.update(status="duplicate", duplicate_of=files[seen[sha256]][0])
+            continue
+        seen[sha256] = i
+        raw = _payload_bytes(payload)
+        try:
+            pages = parse_document(raw, detect_kind(name, content_type))
+        except (UnsupportedFileType, ParseError) as e:
+            res.update(status="failed", error=str(e))
+            continue
+        doc = PreparedDocument(
+            filename=name, sha256=sha256, size=len(raw), chunks=chunk_document(pages)
+        )
+        prepared.append((i, doc))
+
+    texts = [c["content"] for _, d in prepared for c in d.chunks]
+    written = {d.doc_id for d in store_documents([d for _, d in prepared], embed_chunks(texts))}
+    raced: Dict[str, Dict[str, Any]] = {}
+    if len(written) < len(prepared):
+        with SessionLocal() as session:
+            raced = find_duplicates(session, [d.sha256 for _, d in prepared])
+    chunks = 0
+    for i, d in prepared:
+        if d.doc_id in written:
+            chunks += len(d.chunks)
+            results[i].update(
+                status="ingested", doc_id=str(d.doc_id), chunks=len(d.chunks), tokens=d.tokens
+            )
+        else:
+            results[i].update(status="duplicate", **raced.get(d.sha256, {}))
+
+    counts = Counter(r["status"] for r in results)
+    return {
+        "results": results,
+        "stats": {
+            "files": len(files),
+            "ingested": counts.get("ingested", 0),
+            "duplicates": counts.get("duplicate", 0),
+            "failed": counts.get("failed", 0),
+            "chunks": chunks,
+        },
+    }
+
+
+_REFRESHED_COLUMNS = ("id", "page", "meta", "source", "section")
+
+
+def diff_chunks(
+    stored: Sequence[Any], chunks: Sequence[Dict[str, Any]]
+) -> Tuple[List[Tuple[Any, Dict[str, Any]]], List[Dict[str, Any]], List[Any]]:
+    """
+    Match new chunks to stored rows (with `content_hash`) by content hash, as multisets.
+    Returns (kept as (stored row, new chunk), added chunks, removed stored rows).
+    """
+    pool: Dict[str, List[Any]] = {}
+    for row in stored:
+        pool.setdefault(row.content_hash, []).append(row)
+    kept: List[Tuple[Any, Dict[str, Any]]] = []
+    added: List[Dict[str, Any]] = []
+    for c in chunks:
+        rows = pool.get(content_hash(c["content"]))
+        if rows:
+            kept.append((rows.pop(0), c))
+        else:
+            added.append(c)
+    removed = [row for rows in pool.values() for row in rows]
+    return kept, added, removed
+
+
+def update_document(
+    doc_id: UUID, raw: bytes, filename: str | None, kind: str, sha256: str
+) -> Dict[str, Any]:
+    """
+    Re-ingest a new version of a document in place. Chunks whose content hash is unchanged
+    keep their row and vector (page/meta refreshed); only added chunks are embedded.
+    Removals, updates and inserts are written in one transaction.
+    """
+    with SessionLocal() as session:
+        doc = session.get(Document, doc_id)
+        if doc is None:
+            raise DocumentNotFound(str(doc_id))
+        previous_sha = (doc.meta or {}).get("sha256")
+        name = filename or doc.filename
+        other = find_duplicate(session, sha256)
+        if other is not None and other["doc_id"] != str(doc_id):
+            raise DocumentConflict(f"Content already ingested as document {other['doc_id']}")
+        stored = session.execute(
+            select(Chunk.id, Chunk.content_hash, Chunk.page, Chunk.meta).where(
+                Chunk.document_id == doc_id
+            )
+        ).all()
+
+    chunks = chunk_document(parse_document(raw, kind))
+    kept, added, removed = diff_chunks(stored, chunks)
+    new = PreparedDocument(filename=name, sha256=sha256, size=len(raw), chunks=added, doc_id=doc_id)
+    vectors = embed_chunks([c["content"] for c in added])
+
+    # Kept rows move with their content: refresh page and metadata where they differ
+    changed = [
+        {k: v for k, v in _chunk_row(doc_id, row.id, c).items() if k in _REFRESHED_COLUMNS}
+        for row, c in kept
+        if (row.page, row.meta) != (c.get("page"), c.get("meta"))
+    ]
+    with timed("db_write"), SessionLocal() as session:
+        # Optimistic concurrency: the version the diff was computed against is still current
+        current = session.execute(
+            select(Document).where(Document.id == doc_id).with_for_update()
+        ).scalar_one_or_none()
+        if current is None:
+            raise DocumentNotFound(str(doc_id))
+        if (current.meta or {}).get("sha256") != previous_sha:
+            raise DocumentConflict("Document changed during the update; retry")
+        try:
+            if removed:
+                session.execute(delete(Chunk).where(Chunk.id.in_([row.id for row in removed])))
+            if changed:
+                session.execute(update(Chunk), changed)
+            postings = _copy_chunks(session, [new], vectors)
+            current.filename = name
+            current.meta = {**(current.meta or {}), "sha256": sha256, "size": len(raw)}
+            current.chunk_count = len(chunks)
+            session.commit()
+        except IntegrityError as e:
+            # A concurrent upload committed the same content after the duplicate check above
+            # (ux_documents_sha256)
+            session.rollback()
+            other = find_duplicate(session, sha256)
+            if other is None or other["doc_id"] == str(doc_id):
+                raise
+            raise DocumentConflict(f"Content already ingested as document {other['doc_id']}") from e
+    remove_from_bm25_index(str(row.id) for row in removed)
+    update_bm25_index(postings)
+    bump_corpus_generation()
+    return {
+        "doc_id": str(doc_id),
+        "stats": {
+            "chunks": len(chunks),
+            "tokens": sum(chunk_tokens(c) for c in chunks),
+            "unchanged": len(kept),
+            "added": len(added),
+            "removed": len(removed),
+        },
+    }
+
+
+def delete_document(doc_id: UUID) -> bool:
+    """Delete a document with its chunks, vectors and postings; False if it does not exist."""
+    with SessionLocal() as session:
+        chunk_ids = (
+            session.execute(delete(Chunk).where(Chunk.document_id == doc_id).returning(Chunk.id))
+            .scalars()
+            .all()
+        )
+        deleted = session.execute(
+            delete(Document).where(Document.id == doc_id).returning(Document.id)
+        ).scalar_one_or_none()
+        session.commit()
+    if deleted is None:
+        return False
+    remove_from_bm25_index(str(cid) for cid in chunk_ids)
+    bump_corpus_generation()
+    return True
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from core.ingestion import ParseError, find_duplicate, ingest_bytes
+from core.settings import settings
+from db.base import SessionLocal
+from db.models import IngestJob
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = frozenset({"succeeded", "failed"})
+
+# Set on enqueue so idle workers in this process pick the job up without waiting a poll
+_wakeup = threading.Event()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_ingest(
+    session: Session, *, filename: str | None, kind: str, sha256: str, payload: bytes
+) -> UUID:
+    job_id = uuid4()
+    session.add(
+        IngestJob(
+            id=job_id,
+            status="queued",
+            stage="queued",
+            filename=filename,
+            kind=kind,
+            sha256=sha256,
+            payload=payload,
+            attempts=0,
+            max_attempts=settings.ingest_max_attempts,
+        )
+    )
+    session.commit()
+    _wakeup.set()
+    return job_id
+
+
+def claim_job(job_id: Optional[UUID] = None) -> Optional[UUID]:
+    """
+    Atomically move one runnable job to `running` (FOR UPDATE SKIP LOCKED).
+    Running jobs whose lease expired (worker died) are runnable again, unless that was
+    their last attempt: a job that keeps killing its worker is failed instead.
+    """
+    while True:
+        now = _now()
+        lease_expired = now - timedelta(seconds=settings.ingest_job_lease_seconds)
+        stmt = (
+            select(IngestJob)
+            .where(
+                or_(
+                    and_(IngestJob.status == "queued", IngestJob.run_after <= now),
+                    and_(IngestJob.status == "running", IngestJob.locked_at < lease_expired),
+                )
+            )
+            .order_by(IngestJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if job_id is not None:
+            stmt = stmt.where(IngestJob.id == job_id)
+        with SessionLocal() as session:
+            job = session.execute(stmt).scalars().first()
+            if job is None:
+                return None
+            claimed = job.id
+            if job.status == "running" and job.attempts >= job.max_attempts:
+                job.status = "failed"
+                job.stage = "failed"
+                job.error = f"Worker lost the job on each of {job.attempts} attempts"
+                job.locked_at = None
+                job.payload = None
+                job.updated_at = now
+                session.commit()
+                logger.error("ingest_job_abandoned", extra={"job_id": str(claimed)})
+                if job_id is not None:
+                    return None
+                continue
+            job.status = "running"
+            job.attempts += 1
+            job.locked_at = now
+            job.updated_at = now
+            session.commit()
+        return claimed
+
+
+def _update_job(job_id: UUID, **values: Any) -> None:
+    with SessionLocal() as session:
+        session.execute(
+            update(IngestJob).where(IngestJob.id == job_id).values(updated_at=_now(), **values)
+        )
+        session.commit()
+
+
+def _set_stage(job_id: UUID, stage: str) -> None:
+    _update_job(job_id, stage=stage, locked_at=_now())
+
+
+@contextmanager
+def _lease_heartbeat(job_id: UUID) -> Iterator[None]:
+    """
+    Renew the job's lease every third of INGEST_JOB_LEASE_SECONDS while the block runs, so a
+    single long stage (a large PDF parse or embed) does not let another worker reclaim it.
+    """
+    stop = threading.Event()
+    interval = max(1.0, settings.ingest_job_lease_seconds / 3)
+
+    def beat() -> None:
+        while not stop.wait(interval):
+            try:
+                _update_job(job_id, locked_at=_now())
+            except Exception:
+                logger.warning("ingest_job_heartbeat_failed", exc_info=True)
+
+    th = threading.Thread(target=beat, name="ingest-heartbeat", daemon=True)
+    th.start()
+    try:
+        yield
+    finally:
+        # Stopped before the outcome is recorded, so no beat lands after it
+        stop.set()
+        th.join()
+
+
+def run_job(job_id: UUID) -> None:
+    """Run one claimed attempt and record success, a scheduled retry, or failure."""
+    with SessionLocal() as session:
+        job = session.get(IngestJob, job_id)
+        if job is None or job.payload is None:
+            return
+        raw, filename, kind, sha256 = job.payload, job.filename, job.kind, job.sha256
+        attempts, max_attempts = job.attempts, job.max_attempts
+
+    try:
+        with _lease_heartbeat(job_id):
+            # A concurrent upload of the same bytes may have finished first
+            with SessionLocal() as session:
+                result = find_duplicate(session, sha256)
+            if result is None:
+                result = ingest_bytes(
+                    raw, filename, kind, sha256, on_stage=lambda stage: _set_stage(job_id, stage)
+                )
+    except Exception as e:
+        retry = not isinstance(e, ParseError) and attempts < max_attempts
+        logger.exception("ingest_job_failed", extra={"job_id": str(job_id), "retry": retry})
+        if retry:
+            backoff = settings.ingest_retry_backoff_seconds * 2 ** (attempts - 1)
+            _update_job(
+                job_id,
+                status="queued",
+                stage="queued",
+                error=str(e)[:2000],
+                locked_at=None,
+                run_after=_now() + timedelta(seconds=backoff),
+            )
+        else:
+            _update_job(
+                job_id,
+                status="failed",
+                stage="failed",
+                error=str(e)[:2000],
+                locked_at=None,
+                payload=None,
+            )
+        return
+
+    _update_job(
+        job_id,
+        status="succeeded",
+        stage="done",
+        error=None,
+        result=result,
+        locked_at=None,
+        payload=None,
+    )
+    logger.info("ingest_job_succeeded", extra={"job_id": str(job_id)})
+
+
+def process_next() -> bool:
+    job_id = claim_job()
+    if job_id is None:
+        return False
+    run_job(job_id)
+    return True
+
+
+def get_job(job_id: UUID) -> Optional[Dict[str, Any]]:
+    with SessionLocal() as session:
+        job = session.get(IngestJob, job_id)
+        if job is None:
+            return None
+        result = job.result or {}
+        return {
+            "job_id": str(job.id),
+            "status": job.status,
+            "stage": job.stage,
+            "filename": job.filename,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "error": job.error,
+            "doc_id": result.get("doc_id"),
+            "stats": result.get("stats"),
+            "created_at": job.created_at.isoformat(),
+            "updated_at": job.updated_at.isoformat(),
+        }
+
+
+def _worker_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            worked = process_next()
+        except Exception:
+            logger.warning("ingest_worker_poll_failed", exc_info=True)
+            worked = False
+        if not worked:
+            _wakeup.wait(settings.ingest_poll_interval_seconds)
+            _wakeup.clear()
+
+
+_workers: List[threading.Thread] = []
+_stop = threading.Event()
+
+
+def start_workers(count: int) -> None:
+    if _workers:
+        return
+    _stop.clear()
+    for i in range(count):
+        th = threading.Thread(
+            target=_worker_loop, args=(_stop,), name=f"ingest-worker-{i}", daemon=True
+        )
+        th.start()
+        _workers.append(th)
+    logger.info("ingest_workers_started", extra={"workers": count})
+
+
+def stop_workers(timeout: float = 5.0) -> None:
+    _stop.set()
+    _wakeup.set()
+    for th in _workers:
+        th.join(timeout=timeout)
+    _workers.clear()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+from core.settings import settings
+from core.vectorstore import chunk_filter_sql
+from db.base import engine
+
+
+def search_fulltext(
+    query: str, k: int, filters: Dict[str, Any] | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Top-k chunks by ts_rank_cd over the GIN-indexed `chunks.tsv` column, ranked in Postgres.
+    Result dicts match core.retrieval results; `score` is the rank.
+    """
+    filter_sql = chunk_filter_sql(filters)
+    if filter_sql is None:
+        return []
+    clauses, params = filter_sql
+    params.update({"cfg": settings.fts_config, "query": query, "k": k})
+    where = ["c.tsv @@ q", *clauses]
+    sql = text(
+        "SELECT c.id, c.document_id, c.content, c.page, c.source, c.section, "
+        "ts_rank_cd(c.tsv, q) AS rank "
+        "FROM chunks c, websearch_to_tsquery(CAST(:cfg AS regconfig), :query) AS q "
+        f"WHERE {' AND '.join(where)} "
+        "ORDER BY rank DESC LIMIT :k"
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(sql, params).all()
+    return [
+        {
+            "text": r.content,
+            "score": float(r.rank),
+            "source": r.source,
+            "page": r.page,
+            "section": r.section,
+            "doc_id": str(r.document_id),
+            "chunk_id": str(r.id),
+        }
+        for r in rows
+    ]
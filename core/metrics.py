@@ -1,16 +1,41 @@
 from __future__ import annotations
 
-from typing import Optional
-
-from prometheus_client import Counter
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional
 
+from prometheus_client import Counter, Gauge, Histogram
 
 # Counters (no PII in labels)
 rerank_timeouts: Optional[Counter] = None
+cache_requests: Optional[Counter] = None
+db_pool_connections: Optional[Gauge] = None
+stage_duration: Optional[Histogram] = None
+vector_search_plans: Optional[Counter] = None
+
+STAGE_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
 
 
 def init_counters(enable: bool) -> None:
-    global rerank_timeouts
+    global rerank_timeouts, cache_requests, stage_duration, vector_search_plans
     if enable:
         if rerank_timeouts is None:
             rerank_timeouts = Counter(
@@ -18,11 +43,91 @@ def init_counters(enable: bool) -> None:
                 "Number of reranker timeouts",
                 labelnames=("component",),
             )
+        if cache_requests is None:
+            cache_requests = Counter(
+                "rag_cache_requests_total",
+                "Cache lookups by cache and result (hit/miss)",
+                labelnames=("cache", "result"),
+            )
+        if stage_duration is None:
+            stage_duration = Histogram(
+                "rag_stage_duration_seconds",
+                "Duration of query and ingest pipeline stages",
+                labelnames=("stage",),
+                buckets=STAGE_BUCKETS,
+            )
+        if vector_search_plans is None:
+            vector_search_plans = Counter(
+                "rag_vector_search_plans_total",
+                "Vector searches by plan (ann, exact, filtered_ann)",
+                labelnames=("plan",),
+            )
     else:
         rerank_timeouts = None
+        cache_requests = None
+        stage_duration = None
+        vector_search_plans = None
 
 
 def inc_rerank_timeout() -> None:
     if rerank_timeouts is not None:
         rerank_timeouts.labels(component="cross_encoder").inc()
 
+
+def inc_cache(cache: str, hit: bool, amount: int = 1) -> None:
+    if cache_requests is not None and amount > 0:
+        cache_requests.labels(cache=cache, result="hit" if hit else "miss").inc(amount)
+
+
+def inc_vector_search_plan(plan: str) -> None:
+    if vector_search_plans is not None:
+        vector_search_plans.labels(plan=plan).inc()
+
+
+def init_pool_metrics(pool: Any) -> None:
+    """Expose SQLAlchemy QueuePool utilization, read at scrape time."""
+    global db_pool_connections
+    if db_pool_connections is None:
+        db_pool_connections = Gauge(
+            "rag_db_pool_connections",
+            "SQLAlchemy connection pool state",
+            labelnames=("state",),
+        )
+    db_pool_connections.labels(state="size").set_function(pool.size)
+    db_pool_connections.labels(state="checked_out").set_function(pool.checkedout)
+    db_pool_connections.labels(state="checked_in").set_function(pool.checkedin)
+    # QueuePool.overflow() counts from -pool_size until the pool is full
+    db_pool_connections.labels(state="overflow").set_function(lambda: max(0, pool.overflow()))
+
+
+class StageTimings:
+    """Per-request stage durations in seconds, summed when a stage runs more than once."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.durations: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+
+# Set by the Server-Timing middleware; pools copy the context, so worker threads share it
+stage_timings_ctx: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    if stage_duration is not None:
+        stage_duration.labels(stage=stage).observe(seconds)
+    timings = stage_timings_ctx.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, perf_counter() - t0)
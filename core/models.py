@@ -6,6 +6,7 @@ import time
 from typing import Optional
 
 from core.embeddings import get_embeddings
+from core.reranker import get_reranker
 from core.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -20,14 +21,13 @@ def warmup() -> None:
         # Embeddings
         _ = get_embeddings()
         logger.info("embeddings_warmup_completed")
-        # Optional reranker warmup
-        try:
-            from sentence_transformers import CrossEncoder  # noqa: F401
-
-            # Do not instantiate here to avoid heavy cost if not used; import ensures availability
-            logger.info("reranker_import_ready")
-        except Exception:
-            logger.info("reranker_not_available")
+        # Optional reranker warmup: load once and run a tiny batch so the first query skips it
+        if settings.warmup_reranker:
+            try:
+                get_reranker().score("warmup", ["warmup"])
+                logger.info("reranker_warmup_completed")
+            except Exception:
+                logger.info("reranker_not_available")
         _models_ready = True
     finally:
         logger.info("models_warmup_time", extra={"duration": round(time.time() - t0, 3)})
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+FP32_MODEL = "model.onnx"
+INT8_MODEL = "model_int8.onnx"
+
+
+def cls_pool(last_hidden_state: np.ndarray) -> np.ndarray:
+    """BGE sentence embedding: the [CLS] token state, L2-normalized."""
+    cls = last_hidden_state[:, 0, :]
+    norms = np.linalg.norm(cls, axis=1, keepdims=True)
+    pooled: np.ndarray = cls / np.clip(norms, 1e-12, None)
+    return pooled
+
+
+def quantize_model(model_dir: Path) -> Path:
+    """Int8 dynamic quantization of `model.onnx` (weights only; activations stay float)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    src, dst = model_dir / FP32_MODEL, model_dir / INT8_MODEL
+    if not dst.exists():
+        logger.info("onnx_quantize_started", extra={"model": str(src)})
+        quantize_dynamic(str(src), str(dst), weight_type=QuantType.QInt8)
+    return dst
+
+
+class OnnxBgeEmbeddings(Embeddings):
+    """
+    BGE embeddings from an exported ONNX model (see scripts/onnx_embeddings.py export).
+    `model_dir` holds model.onnx and tokenizer.json; vectors match HuggingFaceBgeEmbeddings
+    with normalize_embeddings=True, including the query instruction.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantize: bool = True,
+        threads: int = 0,
+        batch_size: int = 32,
+        max_length: int = 512,
+        query_instruction: str = "",
+    ) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = Path(model_dir)
+        model_path = quantize_model(path) if quantize else path / FP32_MODEL
+        opts = ort.SessionOptions()
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            str(model_path), sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self._tokenizer = Tokenizer.from_file(str(path / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding()
+        self.batch_size = max(1, batch_size)
+        self.query_instruction = query_instruction
+
+    def _embed(self, texts: Sequence[str]) -> List[List[float]]:
+        out: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            encodings = self._tokenizer.encode_batch(list(texts[i : i + self.batch_size]))
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            feeds = {k: v for k, v in feeds.items() if k in self._input_names}
+            (last_hidden_state,) = self._session.run(["last_hidden_state"], feeds)
+            out.extend(cls_pool(last_hidden_state).tolist())
+        return out
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed([t.replace("\n", " ") for t in texts])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([self.query_instruction + text.replace("\n", " ")])[0]
@@ -1,30 +1,161 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_EXCEPTION, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
 
 import fitz  # PyMuPDF
 import pymupdf4llm
 
+from core.settings import settings
 
-def parse_pdf(data: bytes) -> List[Dict[str, Any]]:
+
+class PdfParseTimeout(TimeoutError):
+    """The document was not parsed within PDF_PARSE_TIMEOUT_SECONDS."""
+
+
+def _parse_range(doc: "fitz.Document", start: int, stop: int) -> List[Dict[str, Any]]:
+    """Markdown per page for 0-based pages [start, stop), with 1-based page numbers."""
+    pages: List[Dict[str, Any]] = []
+    try:
+        # Try to use PyMuPDF4LLM helpers for best quality
+        chunks = pymupdf4llm.to_markdown(doc, pages=list(range(start, stop)), page_chunks=True)
+        for pno, chunk in zip(range(start, stop), chunks):
+            meta = chunk.get("metadata") or {}
+            page_num = meta.get("page_number") or meta.get("page") or pno + 1
+            pages.append({"content": chunk.get("text") or "", "page": int(page_num)})
+    except Exception:
+        # Fallback to plain text extraction, still page by page
+        pages = [
+            {"content": doc[pno].get_text("text"), "page": pno + 1} for pno in range(start, stop)
+        ]
+    for p in pages:
+        p["meta"] = {"source": "pdf"}
+    return pages
+
+
+def _parse_range_from_file(path: str, start: int, stop: int) -> List[Dict[str, Any]]:
+    # Runs in a worker process: each task opens the shared temp file itself
+    with fitz.open(path) as doc:
+        return _parse_range(doc, start, stop)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _new_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: forking a process with live DB pools and worker threads is unsafe
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _new_pool(settings.pdf_parse_workers)
+    return _pool
+
+
+def _terminate(pool: ProcessPoolExecutor) -> None:
     """
-    Parse PDF bytes using PyMuPDF4LLM / PyMuPDF into pages with content.
-    Returns a list of dicts: {content, page, meta}
+    Kill the pool's workers and wait for them to exit. A running task only stops with its
+    process; the executor is unusable afterwards.
     """
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for proc in processes:
+        proc.terminate()
+    for proc in processes:
+        proc.join()
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    _terminate(pool)
+
+
+def _run_ranges(
+    pool: ProcessPoolExecutor, path: str, page_count: int, step: int
+) -> List[Dict[str, Any]]:
+    try:
+        futures: List[Future] = [
+            pool.submit(_parse_range_from_file, path, start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ]
+    except RuntimeError as e:
+        # Shut down by another document's timeout between _get_pool() and submit
+        raise BrokenProcessPool(str(e)) from e
+    done, pending = wait(
+        futures, timeout=settings.pdf_parse_timeout_seconds, return_when=FIRST_EXCEPTION
+    )
+    for fut in done:
+        exc = fut.exception()
+        if exc is not None:
+            raise exc
+    if pending:
+        raise PdfParseTimeout(f"PDF parsing exceeded {settings.pdf_parse_timeout_seconds}s")
     pages: List[Dict[str, Any]] = []
-    with fitz.open(stream=data, filetype="pdf") as doc:
-        # Try to use PyMuPDF4LLM helpers for best quality
-        try:
-            md = pymupdf4llm.to_markdown(doc)
-            # Fallback to page-by-page extraction to preserve page numbers
-            if not md:
-                raise ValueError("empty md")
-            # When full-document markdown is produced, split per page markers if present
-            # Otherwise, provide a single-page aggregate
-            pages.append({"content": md, "page": 1, "meta": {"source": "pdf"}})
-        except Exception:
-            for i, page in enumerate(doc, start=1):
-                text = page.get_text("text")
-                pages.append({"content": text, "page": i, "meta": {"source": "pdf"}})
+    for fut in futures:
+        pages.extend(fut.result())
     return pages
 
+
+def _parse_file(path: str, page_count: int) -> List[Dict[str, Any]]:
+    if settings.pdf_parse_workers <= 0:
+        # No standing pool: a short-lived process keeps the parse killable
+        own = _new_pool(1)
+        try:
+            pages = _run_ranges(own, path, page_count, max(1, page_count))
+        except BaseException:
+            _terminate(own)
+            raise
+        own.shutdown()
+        return pages
+
+    step = max(1, settings.pdf_pages_per_task)
+    retried = False
+    while True:
+        pool = _get_pool()
+        try:
+            return _run_ranges(pool, path, page_count, step)
+        except PdfParseTimeout:
+            # Stop this document's running ranges; the next parse gets a fresh pool
+            _discard_pool(pool)
+            raise
+        except BrokenProcessPool:
+            # A worker died, or another document's timeout tore the pool down: retry once
+            _discard_pool(pool)
+            if retried:
+                raise
+            retried = True
+
+
+def parse_pdf(data: bytes) -> List[Dict[str, Any]]:
+    """
+    Parse PDF bytes using PyMuPDF4LLM / PyMuPDF into pages with content.
+    Returns a list of dicts: {content, page, meta}, one per page with its real page number.
+    Parsing runs in worker processes so PDF_PARSE_TIMEOUT_SECONDS can stop it: documents
+    longer than PDF_PAGES_PER_TASK are split into page ranges across the PDF_PARSE_WORKERS
+    pool (0 = a short-lived process per document).
+    """
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_count = doc.page_count
+    if page_count == 0:
+        return []
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return _parse_file(path, page_count)
+    finally:
+        # Every worker that could read the file has finished or been terminated and joined
+        os.unlink(path)
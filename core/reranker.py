@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, List, Optional, Sequence, Union
+
+from core.hash_embeddings import HashReranker
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker:
+    """Cross-encoder loaded once per process; scores (query, text) pairs in batches."""
+
+    def __init__(self, model_name: str, max_length: int, batch_size: int) -> None:
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        # max_length makes the tokenizer truncate each pair instead of failing on long chunks
+        self.model: Any = CrossEncoder(model_name, max_length=max_length)
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        if not texts:
+            return []
+        pairs = [(query, t) for t in texts]
+        scores = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        return list(map(float, scores))
+
+
+_reranker: Optional[Union[Reranker, HashReranker]] = None
+_lock = threading.Lock()
+
+
+def get_reranker() -> Union[Reranker, HashReranker]:
+    """Process-wide reranker for RERANK_BACKEND (`cross_encoder`, or `hash` stand-in)."""
+    global _reranker
+    if _reranker is None:
+        with _lock:
+            if _reranker is None:
+                if settings.rerank_backend == "hash":
+                    _reranker = HashReranker(settings.embedding_dim)
+                else:
+                    _reranker = Reranker(
+                        settings.rerank_model,
+                        max_length=settings.rerank_max_length,
+                        batch_size=settings.rerank_batch_size,
+                    )
+                logger.info("reranker_loaded")
+    return _reranker
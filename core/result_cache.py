@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from core.cache import TTLCache
+from core.corpus import corpus_generation
+from core.embeddings import embedding_model_id, normalize_query
+from core.metrics import inc_cache
+from core.retrieval import RetrievalRequest, first_pass_many, rerank_results, retrieve_many
+from core.settings import settings
+
+_results: TTLCache[List[Dict[str, Any]]] = TTLCache(
+    maxsize=settings.result_cache_size, ttl=settings.result_cache_ttl
+)
+
+
+def cache_key(req: RetrievalRequest, generation: int) -> Hashable:
+    """Everything that can change the results, with server defaults resolved."""
+    return (
+        generation,
+        embedding_model_id(),
+        normalize_query(req.query),
+        req.top_k,
+        req.rerank,
+        tuple(sorted((k, str(v)) for k, v in (req.filters or {}).items())),
+        req.is_hybrid,
+        (req.fusion or settings.hybrid_fusion) if req.is_hybrid else None,
+        settings.lexical_backend if req.is_hybrid else None,
+        req.ef_search or settings.hnsw_ef_search,
+        req.probes or settings.ivfflat_probes,
+    )
+
+
+def lookup(req: RetrievalRequest) -> Tuple[Hashable, Optional[List[Dict[str, Any]]]]:
+    """(key, cached results or None) for one request at the current corpus generation."""
+    key = cache_key(req, corpus_generation())
+    hit = _results.get(key)
+    inc_cache("query_result", hit=hit is not None)
+    return key, copy.deepcopy(hit) if hit is not None else None
+
+
+def store(key: Hashable, results: List[Dict[str, Any]]) -> None:
+    _results.set(key, copy.deepcopy(results))
+
+
+def retrieve_many_cached(
+    requests: Sequence[RetrievalRequest], use_cache: Sequence[bool] | None = None
+) -> List[List[Dict[str, Any]]]:
+    """
+    `retrieve_many` behind the result cache. Requests with `use_cache` False bypass it
+    (neither read nor written); only the misses reach retrieval, as one batch.
+    Results whose rerank timed out are returned but not cached.
+    """
+    if settings.result_cache_size <= 0:
+        return retrieve_many(requests)
+    use_cache = use_cache if use_cache is not None else [True] * len(requests)
+    out: List[Optional[List[Dict[str, Any]]]] = [None] * len(requests)
+    keys: List[Optional[Hashable]] = [None] * len(requests)
+    for i, (req, use) in enumerate(zip(requests, use_cache)):
+        if use:
+            keys[i], out[i] = lookup(req)
+
+    misses = [i for i, r in enumerate(out) if r is None]
+    if misses:
+        fresh = first_pass_many([requests[i] for i in misses])
+        for i, results in zip(misses, fresh):
+            req = requests[i]
+            complete = rerank_results(req.query, results) if req.rerank else True
+            out[i] = top = results[: req.top_k]
+            if keys[i] is not None and complete:
+                store(keys[i], top)
+    return [r or [] for r in out]
@@ -1,28 +1,287 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
-
-from core.settings import settings
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import contextvars
 import logging
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
 from time import perf_counter
+from typing import Any, Dict, List, Sequence, Tuple
 
-from core.vectorstore import similarity_search_with_score
-from core.metrics import inc_rerank_timeout
-from core.bm25 import bm25_scores
-from core.settings import settings
+from sqlalchemy import Connection, text
 
+from core.bm25 import get_bm25_index
+from core.embeddings import embed_queries
+from core.fusion import rrf_fusion, weighted_fusion
+from core.lexical import search_fulltext
+from core.metrics import inc_rerank_timeout, timed
+from core.reranker import get_reranker
+from core.settings import settings
+from core.vectorstore import (
+    VectorSearch,
+    chunk_filter_sql,
+    plan_search,
+    similarity_search_batch,
+)
+from db.base import engine
 
 logger = logging.getLogger(__name__)
 
+_rerank_executor = ThreadPoolExecutor(
+    max_workers=settings.rerank_workers, thread_name_prefix="rerank"
+)
+# Lexical retrievers run here while the calling thread does the vector search
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=settings.retrieval_workers, thread_name_prefix="retrieval"
+)
+
+# Ranked BM25 ids checked against a large filtered set per query (at least 4 * n)
+BM25_FILTER_PAGE = 256
+
+
+@dataclass
+class RetrievalRequest:
+    query: str
+    top_k: int
+    rerank: bool = False
+    filters: Dict[str, Any] | None = None
+    hybrid: bool | None = None
+    ef_search: int | None = None
+    probes: int | None = None
+    fusion: str | None = None
+
+    @property
+    def is_hybrid(self) -> bool:
+        return settings.hybrid_enabled if self.hybrid is None else self.hybrid
+
+    @property
+    def initial_k(self) -> int:
+        # Rerank and hybrid fusion need a deeper first pass than top_k
+        if self.rerank or self.is_hybrid:
+            return max(self.top_k, settings.hybrid_topn)
+        return self.top_k
+
+    @property
+    def metadata_filter(self) -> Dict[str, Any] | None:
+        if not self.filters:
+            return None
+        metadata_filter: Dict[str, Any] = {}
+        if self.filters.get("doc_id"):
+            metadata_filter["doc_id"] = str(self.filters["doc_id"])
+        if self.filters.get("source"):
+            metadata_filter["source"] = self.filters["source"]
+        if self.filters.get("section"):
+            metadata_filter["section"] = self.filters["section"]
+        return metadata_filter
+
+
+def _vector_candidates(requests: Sequence[RetrievalRequest]) -> List[List[Dict[str, Any]]]:
+    """
+    Nearest chunks by embedding for each request, in order; `score` is the cosine distance
+    (lower is better). Queries are embedded in one batch and searched over one connection.
+    """
+    with timed("query_embedding"):
+        vectors = embed_queries([r.query for r in requests])
+    with timed("vector_search"):
+        searches = similarity_search_batch(
+            [
+                VectorSearch(vec, r.initial_k, r.metadata_filter, r.ef_search, r.probes)
+                for r, vec in zip(requests, vectors)
+            ]
+        )
+    return [
+        [
+            {
+                "text": doc.page_content,
+                "score": float(score),
+                "source": doc.metadata.get("source"),
+                "page": doc.metadata.get("page"),
+                "section": doc.metadata.get("section"),
+                "doc_id": doc.metadata.get("doc_id"),
+                "chunk_id": doc.metadata.get("chunk_id") or doc.id,
+            }
+            for doc, score in docs_scores
+        ]
+        for docs_scores in searches
+    ]
+
+
+def _bm25_rows(
+    conn: Connection,
+    ranked: Sequence[Tuple[str, float]],
+    clauses: List[str],
+    params: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """Result dicts for ranked chunk ids that pass the filter clauses, in ranked order."""
+    if not ranked:
+        return []
+    where = " AND ".join(["c.id = ANY(:ids)", *clauses])
+    sql = text(
+        "SELECT c.id, c.document_id, c.content, c.page, c.source, c.section "
+        f"FROM chunks c WHERE {where}"
+    )
+    ids = [uuid.UUID(cid) for cid, _ in ranked]
+    rows = {str(r.id): r for r in conn.execute(sql, {**params, "ids": ids})}
+    return [
+        {
+            "text": rows[cid].content,
+            "score": float(score),
+            "source": rows[cid].source,
+            "page": rows[cid].page,
+            "section": rows[cid].section,
+            "doc_id": str(rows[cid].document_id),
+            "chunk_id": cid,
+        }
+        for cid, score in ranked
+        if cid in rows
+    ]
+
 
-def _normalize(scores: list[float]) -> list[float]:
-    if not scores:
+def _bm25_candidates(query: str, n: int, filters: Dict[str, Any] | None) -> List[Dict[str, Any]]:
+    """
+    Top-n BM25 chunks passing `filters`, best first; `score` is the BM25 score. Filters
+    apply before the cut: a small filtered set (same threshold as the vector planner)
+    restricts ranking to its chunk ids, a large one is walked in corpus-wide rank order
+    until n chunks pass.
+    """
+    filter_sql = chunk_filter_sql(filters)
+    if filter_sql is None:
         return []
-    mn, mx = min(scores), max(scores)
-    if mx - mn < 1e-9:
-        return [0.5 for _ in scores]
-    return [(s - mn) / (mx - mn) for s in scores]
+    clauses, params = filter_sql
+    index = get_bm25_index()
+    with engine.connect() as conn:
+        if not clauses:
+            return _bm25_rows(conn, index.top_n(query, n), [], {})
+        if plan_search(conn, clauses, params) == "exact":
+            ids = conn.execute(
+                text(f"SELECT c.id FROM chunks c WHERE {' AND '.join(clauses)}"), params
+            ).scalars()
+            allowed = {str(cid) for cid in ids}
+            return _bm25_rows(conn, index.top_n(query, n, allowed), [], {})
+        ranked = index.rank(query)
+        page = max(4 * n, BM25_FILTER_PAGE)
+        out: List[Dict[str, Any]] = []
+        for i in range(0, len(ranked), page):
+            out.extend(_bm25_rows(conn, ranked[i : i + page], clauses, params))
+            if len(out) >= n:
+                break
+    return out[:n]
+
+
+def _lexical_candidates(query: str, n: int, filters: Dict[str, Any] | None) -> List[Dict[str, Any]]:
+    with timed("lexical"):
+        if settings.lexical_backend == "fts":
+            return search_fulltext(query, n, filters)
+        return _bm25_candidates(query, n, filters)
+
+
+def _with_bm25_scores(
+    query: str, lexical: List[Dict[str, Any]], vector: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Give vector candidates outside the BM25 top-n their BM25 score too (in-memory, cheap),
+    so weighted fusion does not treat them as lexical misses. Returns the run best first.
+    """
+    index = get_bm25_index()
+    have = {r["chunk_id"] for r in lexical}
+    missing = [r for r in vector if r["chunk_id"] not in have]
+    by_id = index.scores(query, (r["chunk_id"] for r in missing if r["chunk_id"]))
+    extra = []
+    for r in missing:
+        s = by_id[r["chunk_id"]] if r["chunk_id"] in by_id else index.score_text(query, r["text"])
+        if s > 0:
+            extra.append({**r, "score": s})
+    return sorted(lexical + extra, key=lambda x: x["score"], reverse=True)
+
+
+def _fuse(
+    req: RetrievalRequest, vector: List[Dict[str, Any]], lexical: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    strategy = req.fusion or settings.hybrid_fusion
+    if strategy == "rrf":
+        return rrf_fusion([vector, lexical], k=settings.rrf_k)
+    # Approximate cosine similarity from vector score (distance -> similarity)
+    alpha = settings.hybrid_weight
+    return weighted_fusion(
+        [vector, lexical],
+        [[1.0 / (1.0 + r["score"]) for r in vector], [r["score"] for r in lexical]],
+        [alpha, 1 - alpha],
+    )
+
+
+def rerank_results(query: str, results: List[Dict[str, Any]]) -> bool:
+    """
+    Rescore and re-sort `results` in place with the cross-encoder. Returns False when the
+    rerank timed out or failed, leaving first-pass scores and order untouched.
+    """
+
+    def _do_rerank() -> List[float]:
+        return get_reranker().score(query, [r["text"] for r in results])
+
+    try:
+        # Shared executor: leaving a `with` block would wait for a timed-out rerank
+        with timed("rerank"):
+            fut = _rerank_executor.submit(_do_rerank)
+            scores = fut.result(timeout=settings.rerank_timeout_seconds)
+    except (TimeoutError, Exception):
+        # Fallback to vector scores on timeout or any failure
+        inc_rerank_timeout()
+        logger.warning("rerank_timeout_or_failure")
+        return False
+    for r, s in zip(results, scores):
+        r["score"] = float(s)
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return True
+
+
+def first_pass_many(requests: Sequence[RetrievalRequest]) -> List[List[Dict[str, Any]]]:
+    """
+    Vector (or fused hybrid) candidates for each request, in order, before rerank and
+    truncation. Lexical retrievers for hybrid requests fan out to the pool while this
+    thread embeds every query in one batch and runs the vector searches over a single
+    connection.
+    """
+    lex_futures: Dict[int, Future] = {}
+    for i, req in enumerate(requests):
+        if req.is_hybrid:
+            ctx = contextvars.copy_context()
+            lex_futures[i] = _retrieval_executor.submit(
+                ctx.run, _lexical_candidates, req.query, settings.hybrid_topn, req.filters
+            )
+    vector_runs = _vector_candidates(requests)
+
+    out: List[List[Dict[str, Any]]] = []
+    for i, (req, vector) in enumerate(zip(requests, vector_runs)):
+        results = vector
+        if i in lex_futures:
+            lexical = lex_futures[i].result()
+            t_fusion = perf_counter()
+            if settings.lexical_backend != "fts":
+                with timed("bm25_rescore"):
+                    lexical = _with_bm25_scores(req.query, lexical, vector)
+            with timed("fusion"):
+                results = _fuse(req, vector, lexical)
+            logger.info(
+                "hybrid_fusion_completed",
+                extra={
+                    "strategy": req.fusion or settings.hybrid_fusion,
+                    "vector": len(vector),
+                    "lexical": len(lexical),
+                    "duration": round(perf_counter() - t_fusion, 4),
+                },
+            )
+        out.append(results)
+    return out
+
+
+def retrieve_many(requests: Sequence[RetrievalRequest]) -> List[List[Dict[str, Any]]]:
+    """Retrieve for many requests at once (see `first_pass_many`), results in request order."""
+    out: List[List[Dict[str, Any]]] = []
+    for req, results in zip(requests, first_pass_many(requests)):
+        if req.rerank:
+            rerank_results(req.query, results)
+        out.append(results[: req.top_k])
+    return out
 
 
 def retrieve(
@@ -31,78 +290,9 @@ def retrieve(
     rerank: bool = False,
     filters: Dict[str, Any] | None = None,
     hybrid: bool | None = None,
+    ef_search: int | None = None,
+    probes: int | None = None,
+    fusion: str | None = None,
 ) -> List[Dict[str, Any]]:
-    req_hybrid = settings.hybrid_enabled if hybrid is None else hybrid
-    # First pass with vector similarity
-    initial_k = max(top_k, settings.hybrid_topn) if (rerank or req_hybrid) else top_k
-    metadata_filter: Dict[str, Any] | None = None
-    if filters:
-        metadata_filter = {}
-        if filters.get("doc_id"):
-            metadata_filter["doc_id"] = str(filters["doc_id"])
-        if filters.get("source"):
-            metadata_filter["source"] = filters["source"]
-        if filters.get("section"):
-            metadata_filter["section"] = filters["section"]
-
-    docs_scores = similarity_search_with_score(query, k=initial_k, metadata_filter=metadata_filter)
-
-    results = [
-        {
-            "text": doc.page_content,
-            "score": float(score),
-            "source": doc.metadata.get("source"),
-            "page": doc.metadata.get("page"),
-            "section": doc.metadata.get("section"),
-            "doc_id": doc.metadata.get("doc_id"),
-        }
-        for doc, score in docs_scores
-    ]
-
-    # Optional hybrid fusion with BM25 over candidates (or small global sample)
-    if req_hybrid:
-        t_h0 = perf_counter()
-        texts = [r["text"] for r in results]
-        if len(texts) < max(10, top_k):
-            # Fallback: expand with more corpus by querying more vectors
-            extra = similarity_search_with_score(query, k=settings.hybrid_topn * 2, metadata_filter=filters)
-            texts = list({*texts, *[d.page_content for d, _ in extra]})
-        bm25 = bm25_scores(query, texts)
-        # Normalize both
-        # Approximate cosine similarity from vector score (distance -> similarity)
-        vec_scores = [r["score"] for r in results]
-        vec_sims = _normalize([1.0 / (1.0 + s) for s in vec_scores]) if vec_scores else []
-        bm25_norm = _normalize(bm25)
-        # Align lengths
-        L = min(len(vec_sims), len(bm25_norm))
-        fused = []
-        alpha = settings.hybrid_weight
-        for i in range(L):
-            fused.append(alpha * vec_sims[i] + (1 - alpha) * bm25_norm[i])
-        # Apply fused scores back (scale to 0..1)
-        for i in range(L):
-            results[i]["score"] = float(fused[i])
-        results.sort(key=lambda x: x["score"], reverse=True)
-        logger.info("hybrid_fusion_completed")
-
-    if rerank:
-        def _do_rerank() -> List[float]:
-            from sentence_transformers import CrossEncoder
-
-            model = CrossEncoder(settings.rerank_model)
-            pairs = [(query, r["text"]) for r in results]
-            return list(map(float, model.predict(pairs)))
-
-        try:
-            with ThreadPoolExecutor(max_workers=1) as ex:
-                fut = ex.submit(_do_rerank)
-                scores = fut.result(timeout=settings.rerank_timeout_seconds)
-            for r, s in zip(results, scores):
-                r["score"] = float(s)
-            results.sort(key=lambda x: x["score"], reverse=True)
-        except (TimeoutError, Exception):
-            # Fallback to vector scores on timeout or any failure
-            inc_rerank_timeout()
-            logger.warning("rerank_timeout_or_failure")
-
-    return results[:top_k]
+    req = RetrievalRequest(query, top_k, rerank, filters, hybrid, ef_search, probes, fusion)
+    return retrieve_many([req])[0]
@@ -23,28 +23,99 @@ class Settings:
     database_url: str = os.getenv(
         "DATABASE_URL", "postgresql+psycopg://postgres:postgres@db:5432/postgres"
     )
-    pgvector_collection: str = os.getenv("PGVECTOR_COLLECTION", "rag_embeddings")
+    # Shared SQLAlchemy pool (ORM sessions and the vector store)
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    db_pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
 
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+    embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "384"))
+    # torch (sentence-transformers) | onnx (exported model, optional int8 quantization)
+    # | hash (deterministic stand-in for benchmarks and tests)
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    onnx_model_dir: str = os.getenv("ONNX_MODEL_DIR", "models/onnx/bge-small-en-v1.5")
+    onnx_quantize: bool = _get_bool("ONNX_QUANTIZE", True)
+    embedding_threads: int = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 = runtime default
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
     rerank_model: str = os.getenv("RERANK_MODEL", "BAAI/bge-reranker-v2-m3")
+    # Content-hash -> vector table consulted before embedding chunks at ingest
+    embedding_cache_enabled: bool = _get_bool("EMBEDDING_CACHE_ENABLED", True)
+    # Oldest cached vectors are evicted past this many rows (0 = unbounded)
+    embedding_cache_max_rows: int = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "1000000"))
+    # Query embedding cache (0 disables)
+    query_embedding_cache_size: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "10000"))
+    query_embedding_cache_ttl: int = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+    # /query result cache (0 disables), invalidated by the corpus generation counter
+    result_cache_size: int = int(os.getenv("RESULT_CACHE_SIZE", "1000"))
+    result_cache_ttl: int = int(os.getenv("RESULT_CACHE_TTL", "600"))
+    result_cache_generation_refresh_seconds: float = float(
+        os.getenv("RESULT_CACHE_GENERATION_REFRESH_SECONDS", "1")
+    )
 
     chunk_size: int = int(os.getenv("CHUNK_SIZE", "500"))
     chunk_overlap: int = int(os.getenv("CHUNK_OVERLAP", "75"))
     top_k: int = int(os.getenv("TOP_K", "5"))
+    query_workers: int = int(os.getenv("QUERY_WORKERS", "8"))
+    query_batch_max: int = int(os.getenv("QUERY_BATCH_MAX", "256"))
     max_upload_mb: int = int(os.getenv("MAX_UPLOAD_MB", "25"))
+
+    # PDF parsing: page ranges fanned out over a process pool (0 = a process per document)
+    pdf_parse_workers: int = int(os.getenv("PDF_PARSE_WORKERS", "4"))
+    pdf_pages_per_task: int = int(os.getenv("PDF_PAGES_PER_TASK", "32"))
+    pdf_parse_timeout_seconds: float = float(os.getenv("PDF_PARSE_TIMEOUT_SECONDS", "300"))
+
+    # Bulk ingest
+    embed_batch_size: int = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+    bulk_max_files: int = int(os.getenv("BULK_MAX_FILES", "1000"))
+    bulk_max_upload_mb: int = int(os.getenv("BULK_MAX_UPLOAD_MB", "512"))
+
+    # Ingest job queue (DB-backed, in-process workers)
+    ingest_workers: int = int(os.getenv("INGEST_WORKERS", "2"))
+    ingest_max_attempts: int = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+    ingest_retry_backoff_seconds: float = float(os.getenv("INGEST_RETRY_BACKOFF_SECONDS", "5"))
+    ingest_job_lease_seconds: int = int(os.getenv("INGEST_JOB_LEASE_SECONDS", "600"))
+    ingest_poll_interval_seconds: float = float(os.getenv("INGEST_POLL_INTERVAL_SECONDS", "1"))
+    ingest_wait_timeout_seconds: int = int(os.getenv("INGEST_WAIT_TIMEOUT_SECONDS", "300"))
+
     rerank_timeout_seconds: int = int(os.getenv("RERANK_TIMEOUT_SECONDS", "10"))
+    rerank_batch_size: int = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+    rerank_max_length: int = int(os.getenv("RERANK_MAX_LENGTH", "512"))
+    rerank_workers: int = int(os.getenv("RERANK_WORKERS", "2"))
+    rerank_backend: str = os.getenv("RERANK_BACKEND", "cross_encoder")  # cross_encoder | hash
     enable_metrics: bool = _get_bool("ENABLE_METRICS", True)
+    # Server-Timing response header with per-stage durations
+    server_timing: bool = _get_bool("SERVER_TIMING", False)
 
     # Hybrid retrieval
     hybrid_enabled: bool = _get_bool("HYBRID_ENABLED", False)
     hybrid_weight: float = float(os.getenv("HYBRID_WEIGHT", "0.6"))
     hybrid_topn: int = int(os.getenv("HYBRID_TOPN", "50"))
+    lexical_backend: str = os.getenv("LEXICAL_BACKEND", "bm25")  # bm25 | fts
+    fts_config: str = os.getenv("FTS_CONFIG", "english")
+    hybrid_fusion: str = os.getenv("HYBRID_FUSION", "weighted")  # weighted | rrf
+    rrf_k: int = int(os.getenv("RRF_K", "60"))
+    retrieval_workers: int = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+
+    # ANN index (build-time) and query-time recall knobs
+    ann_index: str = os.getenv("ANN_INDEX", "hnsw")  # hnsw | ivfflat | none
+    hnsw_m: int = int(os.getenv("HNSW_M", "16"))
+    hnsw_ef_construction: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+    ivfflat_lists: int = int(os.getenv("IVFFLAT_LISTS", "100"))
+    hnsw_ef_search: int = int(os.getenv("HNSW_EF_SEARCH", "40"))
+    ivfflat_probes: int = int(os.getenv("IVFFLAT_PROBES", "10"))
+    # Filtered search: exact scan when at most this many chunks match, else filtered ANN
+    exact_search_max_rows: int = int(os.getenv("EXACT_SEARCH_MAX_ROWS", "5000"))
+    # pgvector >= 0.8 iterative index scans for filtered ANN: off | strict_order | relaxed_order
+    vector_iterative_scan: str = os.getenv("VECTOR_ITERATIVE_SCAN", "relaxed_order")
+    hnsw_max_scan_tuples: int = int(os.getenv("HNSW_MAX_SCAN_TUPLES", "20000"))
 
     # Eval
     eval_top_k: int = int(os.getenv("EVAL_TOP_K", "5"))
 
     # Models
     warmup_models: bool = _get_bool("WARMUP_MODELS", True)
+    warmup_reranker: bool = _get_bool("WARMUP_RERANKER", True)
 
 
 settings = Settings()
@@ -1,28 +1,209 @@
 from __future__ import annotations
 
-from typing import Any, Iterable, List, Tuple
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
 
-from langchain_postgres.vectorstores import PGVector
+from langchain_core.documents import Document
+from sqlalchemy import Connection, text
 
-from core.embeddings import get_embeddings
+from core.metrics import inc_vector_search_plan
 from core.settings import settings
+from db.base import engine
 
 
-def get_pgvector() -> PGVector:
-    return PGVector(
-        connection_string=settings.database_url,
-        collection_name=settings.pgvector_collection,
-        embedding_function=get_embeddings(),
-        use_jsonb=True,
+def vector_literal(embedding: Sequence[float]) -> str:
+    """pgvector text form ("[x,y,...]"), accepted by CAST(... AS vector) and by COPY."""
+    return "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+
+
+@dataclass
+class VectorSearch:
+    embedding: List[float]
+    k: int
+    metadata_filter: Dict[str, Any] | None = None
+    ef_search: int | None = None
+    probes: int | None = None
+
+
+FILTER_COLUMNS = ("source", "section")
+
+_SEARCH_KNOBS = text(
+    "SELECT set_config('hnsw.ef_search', :ef_search, true), "
+    "set_config('ivfflat.probes', :probes, true)"
+)
+_ITERATIVE_SCAN_KNOBS = text(
+    "SELECT set_config('hnsw.iterative_scan', :hnsw_scan, true), "
+    "set_config('hnsw.max_scan_tuples', :max_scan_tuples, true), "
+    "set_config('ivfflat.iterative_scan', :ivfflat_scan, true)"
+)
+_COLUMNS = "c.id, c.document_id, c.content, c.page, c.meta"
+
+_pgvector_version: Tuple[int, ...] | None = None
+
+
+def _iterative_scan_supported(conn: Connection) -> bool:
+    """pgvector >= 0.8 has iterative index scans; older versions reject the settings."""
+    global _pgvector_version
+    if _pgvector_version is None:
+        v = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))
+        _pgvector_version = tuple(int(p) for p in re.findall(r"\d+", v.scalar() or ""))
+    return _pgvector_version >= (0, 8)
+
+
+def chunk_filter_sql(
+    filters: Dict[str, Any] | None,
+) -> Tuple[List[str], Dict[str, Any]] | None:
+    """
+    WHERE clauses on the typed chunk columns (table alias `c`) and their params for
+    doc_id/source/section filters; None when nothing can match (doc_id is not a UUID).
+    """
+    clauses: List[str] = []
+    params: Dict[str, Any] = {}
+    for key, value in (filters or {}).items():
+        if not value:
+            continue
+        if key == "doc_id":
+            try:
+                params["f_doc_id"] = uuid.UUID(str(value))
+            except ValueError:
+                return None
+            clauses.append("c.document_id = :f_doc_id")
+        elif key in FILTER_COLUMNS:
+            clauses.append(f"c.{key} = :f_{key}")
+            params[f"f_{key}"] = str(value)
+        else:
+            raise ValueError(f"Unknown filter: {key}")
+    return clauses, params
+
+
+def _filtered_rows(conn: Connection, clauses: List[str], params: Dict[str, Any]) -> int:
+    """
+    Size of the filtered set, capped just above EXACT_SEARCH_MAX_ROWS. A doc_id filter is
+    bounded by documents.chunk_count; otherwise the matching index entries are counted.
+    """
+    cap = settings.exact_search_max_rows + 1
+    if "f_doc_id" in params:
+        n = conn.execute(
+            text("SELECT chunk_count FROM documents WHERE id = :f_doc_id"), params
+        ).scalar()
+        return min(n or 0, cap)
+    sql = text(
+        f"SELECT count(*) FROM (SELECT 1 FROM chunks c WHERE {' AND '.join(clauses)} LIMIT :cap) s"
     )
+    return int(conn.execute(sql, {**params, "cap": cap}).scalar_one())
+
+
+def plan_search(conn: Connection, clauses: List[str], params: Dict[str, Any]) -> str:
+    """
+    "ann" without filters; "exact" when the filtered set is small enough to rank every
+    row (an ANN index would mostly return rows the filter then drops); otherwise
+    "filtered_ann", an index scan that keeps going until k rows pass the filter.
+    """
+    if not clauses:
+        return "ann"
+    if _filtered_rows(conn, clauses, params) <= settings.exact_search_max_rows:
+        return "exact"
+    return "filtered_ann"
+
+
+def _search(conn: Connection, search: VectorSearch) -> List[Tuple[Document, float]]:
+    k = search.k
+    filter_sql = chunk_filter_sql(search.metadata_filter)
+    if filter_sql is None:
+        return []
+    clauses, params = filter_sql
+    params.update(
+        {
+            "q": vector_literal(search.embedding),
+            "k": k,
+            # HNSW returns at most ef_search rows, so never go below k
+            "ef_search": str(max(search.ef_search or settings.hnsw_ef_search, k)),
+            "probes": str(search.probes or settings.ivfflat_probes),
+        }
+    )
+    plan = plan_search(conn, clauses, params)
+    inc_vector_search_plan(plan)
+    where = " AND ".join(["c.embedding IS NOT NULL", *clauses])
+    distance = "c.embedding <=> CAST(:q AS vector) AS distance"
+
+    # SET LOCAL scope: the knobs last until the transaction ends or the next search sets them
+    conn.execute(_SEARCH_KNOBS, params)
+    iterative = settings.vector_iterative_scan if plan == "filtered_ann" else "off"
+    if _iterative_scan_supported(conn):
+        conn.execute(
+            _ITERATIVE_SCAN_KNOBS,
+            {
+                "hnsw_scan": iterative,
+                "max_scan_tuples": str(settings.hnsw_max_scan_tuples),
+                # IVFFlat only scans iteratively in relaxed order
+                "ivfflat_scan": "off" if iterative == "off" else "relaxed_order",
+            },
+        )
+    else:
+        iterative = "off"
+
+    if plan == "exact":
+        # MATERIALIZED keeps the planner off the ANN index: filter by the typed column
+        # indexes, then rank every remaining row exactly
+        sql = text(
+            f"WITH candidates AS MATERIALIZED (SELECT {_COLUMNS}, c.embedding FROM chunks c "
+            f"WHERE {where}) "
+            f"SELECT {_COLUMNS}, {distance} FROM candidates c ORDER BY distance LIMIT :k"
+        )
+    elif iterative == "relaxed_order":
+        # Relaxed iterative scans may return rows slightly out of order; re-sort the top k
+        sql = text(
+            f"WITH ranked AS MATERIALIZED (SELECT {_COLUMNS}, {distance} FROM chunks c "
+            f"WHERE {where} ORDER BY distance LIMIT :k) "
+            "SELECT * FROM ranked ORDER BY distance"
+        )
+    else:
+        sql = text(
+            f"SELECT {_COLUMNS}, {distance} FROM chunks c WHERE {where} "
+            "ORDER BY distance LIMIT :k"
+        )
+    rows = conn.execute(sql, params).all()
+    return [
+        (
+            Document(
+                id=str(r.id),
+                page_content=r.content,
+                metadata={
+                    **(r.meta or {}),
+                    "doc_id": str(r.document_id),
+                    "page": r.page,
+                    "chunk_id": str(r.id),
+                },
+            ),
+            float(r.distance),
+        )
+        for r in rows
+    ]
 
 
-def add_texts(texts: List[str], metadatas: List[dict[str, Any]]) -> List[str]:
-    vs = get_pgvector()
-    ids = vs.add_texts(texts=texts, metadatas=metadatas)
-    return ids
+def similarity_search_batch(
+    searches: Sequence[VectorSearch],
+) -> List[List[Tuple[Document, float]]]:
+    """Run many searches over one pooled connection and transaction; results in order."""
+    if not searches:
+        return []
+    with engine.begin() as conn:
+        return [_search(conn, s) for s in searches]
 
 
-def similarity_search_with_score(query: str, k: int, metadata_filter: dict | None = None) -> List[Tuple[Any, float]]:
-    vs = get_pgvector()
-    return vs.similarity_search_with_score(query, k=k, filter=metadata_filter)
+def similarity_search_with_score_by_vector(
+    embedding: List[float],
+    k: int,
+    metadata_filter: Dict[str, Any] | None = None,
+    ef_search: int | None = None,
+    probes: int | None = None,
+) -> List[Tuple[Document, float]]:
+    """
+    Cosine-distance search with a precomputed query vector (see core.embeddings.embed_query).
+    `ef_search` (HNSW) and `probes` (IVFFlat) trade recall for latency for this query only.
+    """
+    return similarity_search_batch(
+        [VectorSearch(embedding, k, metadata_filter, ef_search, probes)]
+    )[0]
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Sequence
+
+import psycopg
+from psycopg.types.json import Jsonb
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+
+def copy_rows(
+    session: Session, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]
+) -> int:
+    """
+    Bulk-load rows with PostgreSQL COPY on the session's connection, inside its transaction.
+    dict values are sent as JSONB. Returns the number of rows written. Constraint violations
+    raise sqlalchemy IntegrityError, as they would from `session.execute`.
+    """
+    dbapi_conn = session.connection().connection.driver_connection
+    if not isinstance(dbapi_conn, psycopg.Connection):
+        raise TypeError("copy_rows requires the psycopg (v3) driver")
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    n = 0
+    try:
+        with dbapi_conn.cursor() as cur:
+            with cur.copy(statement) as copy:
+                for row in rows:
+                    copy.write_row(tuple(Jsonb(v) if isinstance(v, dict) else v for v in row))
+                    n += 1
+    except psycopg.errors.IntegrityError as e:
+        raise IntegrityError(statement, None, e) from e
+    return n
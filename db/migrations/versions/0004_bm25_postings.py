@@ -0,0 +1,49 @@
+"""persistent BM25 inverted index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row per (term, chunk); doc length is sum(tf) per chunk
+    op.create_table(
+        "bm25_postings",
+        sa.Column("term", sa.Text(), nullable=False),
+        sa.Column(
+            "chunk_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("chunks.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("tf", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("term", "chunk_id"),
+    )
+    op.create_index("ix_bm25_postings_chunk_id", "bm25_postings", ["chunk_id"], unique=False)
+    # Backfill existing chunks; mirrors core.bm25._tokenize (lowercase, whitespace split)
+    op.execute(
+        """
+        INSERT INTO bm25_postings (term, chunk_id, tf)
+        SELECT t.term, c.id, count(*)
+        FROM chunks c, regexp_split_to_table(lower(c.content), '\\s+') AS t(term)
+        WHERE t.term <> ''
+        GROUP BY t.term, c.id;
+        """,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bm25_postings_chunk_id", table_name="bm25_postings")
+    op.drop_table("bm25_postings")
@@ -0,0 +1,34 @@
+"""content-addressed chunk embedding cache
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # sha256(chunk text) + model name -> vector; dimension left open so models can change
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            content_hash VARCHAR(64) NOT NULL,
+            model VARCHAR(256) NOT NULL,
+            embedding vector NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (content_hash, model)
+        );
+        """,
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS embedding_cache;")
@@ -0,0 +1,69 @@
+"""fixed-dimension embeddings and ANN index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+from core.settings import settings
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dim = int(settings.embedding_dim)
+    # Same schema langchain_postgres creates lazily, but with a fixed dimension:
+    # HNSW/IVFFlat cannot index an unsized `vector` column.
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS langchain_pg_collection (
+            uuid UUID PRIMARY KEY,
+            name VARCHAR NOT NULL UNIQUE,
+            cmetadata JSON
+        );
+        """,
+    )
+    op.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS langchain_pg_embedding (
+            id VARCHAR PRIMARY KEY,
+            collection_id UUID REFERENCES langchain_pg_collection (uuid) ON DELETE CASCADE,
+            embedding vector({dim}),
+            document VARCHAR,
+            cmetadata JSONB
+        );
+        """,
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_cmetadata_gin ON langchain_pg_embedding "
+        "USING gin (cmetadata jsonb_path_ops);"
+    )
+    # Tables created by older app versions have an unsized column
+    op.execute(
+        f"ALTER TABLE langchain_pg_embedding ALTER COLUMN embedding TYPE vector({dim}) "
+        f"USING embedding::vector({dim});"
+    )
+    if settings.ann_index == "hnsw":
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_langchain_pg_embedding_ann ON langchain_pg_embedding "
+            f"USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {int(settings.hnsw_m)}, ef_construction = {int(settings.hnsw_ef_construction)});"
+        )
+    elif settings.ann_index == "ivfflat":
+        # IVFFlat centroids come from existing rows; rebuild with scripts/ann_index.py after bulk loads
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_langchain_pg_embedding_ann ON langchain_pg_embedding "
+            f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(settings.ivfflat_lists)});"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_langchain_pg_embedding_ann;")
+    op.execute("ALTER TABLE langchain_pg_embedding ALTER COLUMN embedding TYPE vector;")
@@ -0,0 +1,35 @@
+"""full-text tsvector column and GIN index on chunks
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+from core.settings import settings
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Generated column: filled on every insert (ORM or COPY) and on existing rows now
+    cfg = settings.fts_config.replace("'", "")
+    op.execute(
+        f"""
+        ALTER TABLE chunks
+        ADD COLUMN IF NOT EXISTS tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('{cfg}'::regconfig, content)) STORED;
+        """,
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_chunks_tsv ON chunks USING gin (tsv);")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_chunks_tsv;")
+    op.execute("ALTER TABLE chunks DROP COLUMN IF EXISTS tsv;")
@@ -0,0 +1,35 @@
+"""Corpus generation counter for query result cache invalidation
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "corpus_state",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("generation", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.execute("INSERT INTO corpus_state (id, generation) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table("corpus_state")
@@ -0,0 +1,54 @@
+"""documents.chunk_count, keyset index and trigram filename index
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Written at ingest; backfilled once here instead of aggregating chunks on every listing
+    op.add_column(
+        "documents",
+        sa.Column("chunk_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        UPDATE documents d SET chunk_count = c.n
+        FROM (SELECT document_id, count(*) AS n FROM chunks GROUP BY document_id) c
+        WHERE c.document_id = d.id;
+        """,
+    )
+    # Keyset pagination orders by (created_at DESC, id DESC); id breaks created_at ties
+    op.execute("DROP INDEX IF EXISTS ix_documents_created_at;")
+    op.execute("CREATE INDEX ix_documents_created_at ON documents (created_at, id);")
+    # Backs `filename ILIKE '%q%'`, which a btree cannot serve. pg_trgm is contrib: present in
+    # the pgvector image, absent from minimal builds (e.g. pgserver), where q falls back to a scan.
+    available = (
+        op.get_bind()
+        .execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"))
+        .first()
+    )
+    if available:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_documents_filename_trgm ON documents "
+            "USING gin (filename gin_trgm_ops);"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_documents_filename_trgm;")
+    op.execute("DROP INDEX IF EXISTS ix_documents_created_at;")
+    op.execute("CREATE INDEX ix_documents_created_at ON documents (created_at);")
+    op.drop_column("documents", "chunk_count")
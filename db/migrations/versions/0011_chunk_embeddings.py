@@ -0,0 +1,122 @@
+"""embeddings on chunks; drop the LangChain PGVector tables
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import logging
+
+from alembic import op
+from sqlalchemy import text
+
+from core.settings import settings
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _ann_index(table: str, name: str) -> None:
+    if settings.ann_index == "hnsw":
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            f"USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {int(settings.hnsw_m)}, ef_construction = {int(settings.hnsw_ef_construction)});"
+        )
+    elif settings.ann_index == "ivfflat":
+        # Built after the backfill so the centroids come from the real rows
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(settings.ivfflat_lists)});"
+        )
+
+
+def upgrade() -> None:
+    dim = int(settings.embedding_dim)
+    op.execute(f"ALTER TABLE chunks ADD COLUMN IF NOT EXISTS embedding vector({dim});")
+    # PGVector rows were keyed by chunk id; chunks whose vector write failed stay NULL
+    op.execute(
+        """
+        UPDATE chunks c SET embedding = e.embedding
+        FROM langchain_pg_embedding e
+        WHERE e.id = c.id::text;
+        """,
+    )
+    # Rows written before that got random ids; match them by document and chunk text
+    op.execute(
+        """
+        UPDATE chunks c SET embedding = e.embedding
+        FROM langchain_pg_embedding e
+        WHERE c.embedding IS NULL
+          AND e.cmetadata->>'doc_id' = c.document_id::text
+          AND e.document = c.content;
+        """,
+    )
+    _ann_index("chunks", "ix_chunks_embedding_ann")
+    missing = op.get_bind().execute(text("SELECT count(*) FROM chunks WHERE embedding IS NULL"))
+    unmatched = int(missing.scalar() or 0)
+    if unmatched:
+        # Dropping the old store now could lose vectors this backfill failed to match
+        logger.warning(
+            "%d chunks have no embedding; keeping langchain_pg_embedding and "
+            "langchain_pg_collection, drop them once those chunks are re-embedded",
+            unmatched,
+        )
+        return
+    # Text and metadata were copies of chunks/documents columns
+    op.execute("DROP TABLE IF EXISTS langchain_pg_embedding;")
+    op.execute("DROP TABLE IF EXISTS langchain_pg_collection;")
+
+
+def downgrade() -> None:
+    dim = int(settings.embedding_dim)
+    # Left in place by upgrade when some chunks had no vector; rebuilt from chunks below
+    op.execute("DROP TABLE IF EXISTS langchain_pg_embedding;")
+    op.execute("DROP TABLE IF EXISTS langchain_pg_collection;")
+    op.execute(
+        """
+        CREATE TABLE langchain_pg_collection (
+            uuid UUID PRIMARY KEY,
+            name VARCHAR NOT NULL UNIQUE,
+            cmetadata JSON
+        );
+        """,
+    )
+    op.execute(
+        f"""
+        CREATE TABLE langchain_pg_embedding (
+            id VARCHAR PRIMARY KEY,
+            collection_id UUID REFERENCES langchain_pg_collection (uuid) ON DELETE CASCADE,
+            embedding vector({dim}),
+            document VARCHAR,
+            cmetadata JSONB
+        );
+        """,
+    )
+    op.execute(
+        "CREATE INDEX ix_cmetadata_gin ON langchain_pg_embedding "
+        "USING gin (cmetadata jsonb_path_ops);"
+    )
+    op.execute(
+        "INSERT INTO langchain_pg_collection (uuid, name) VALUES (gen_random_uuid(), 'rag_embeddings');"
+    )
+    op.execute(
+        """
+        INSERT INTO langchain_pg_embedding (id, collection_id, embedding, document, cmetadata)
+        SELECT c.id::text, (SELECT uuid FROM langchain_pg_collection), c.embedding, c.content,
+               coalesce(c.meta, '{}'::jsonb) || jsonb_build_object(
+                   'doc_id', c.document_id::text, 'page', c.page, 'chunk_id', c.id::text
+               )
+        FROM chunks c
+        WHERE c.embedding IS NOT NULL;
+        """,
+    )
+    _ann_index("langchain_pg_embedding", "ix_langchain_pg_embedding_ann")
+    op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_ann;")
+    op.execute("ALTER TABLE chunks DROP COLUMN IF EXISTS embedding;")
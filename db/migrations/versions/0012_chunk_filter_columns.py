@@ -0,0 +1,40 @@
+"""typed, indexed source/section columns on chunks
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("chunks", sa.Column("source", sa.String(length=32), nullable=True))
+    op.add_column("chunks", sa.Column("section", sa.Text(), nullable=True))
+    op.execute(
+        """
+        UPDATE chunks SET source = meta ->> 'source', section = meta ->> 'section'
+        WHERE meta ? 'source' OR meta ? 'section';
+        """,
+    )
+    # doc_id filters use ix_chunks_document_id; most chunks have no section, so index only those
+    op.execute("CREATE INDEX IF NOT EXISTS ix_chunks_source ON chunks (source);")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_chunks_section ON chunks (section) "
+        "WHERE section IS NOT NULL;"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_chunks_section;")
+    op.execute("DROP INDEX IF EXISTS ix_chunks_source;")
+    op.drop_column("chunks", "section")
+    op.drop_column("chunks", "source")
@@ -0,0 +1,29 @@
+"""chunks.content_hash for incremental re-ingestion
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("chunks", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    # Same digest as core.embedding_cache.content_hash: sha256 of the UTF-8 text, hex
+    op.execute(
+        "UPDATE chunks SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex');"
+    )
+    op.alter_column("chunks", "content_hash", nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column("chunks", "content_hash")
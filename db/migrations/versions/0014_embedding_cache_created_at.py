@@ -0,0 +1,26 @@
+"""index embedding_cache.created_at for size-bounded eviction
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # prune_embedding_cache finds the eviction cutoff by walking this index newest-first
+    op.create_index(
+        "ix_embedding_cache_created_at", "embedding_cache", ["created_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_embedding_cache_created_at", table_name="embedding_cache")
@@ -2,11 +2,26 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
-
-from sqlalchemy import Column, DateTime, ForeignKey, Index, String, Text, func
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from typing import Any
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    func,
+)
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from core.settings import settings
 from db.base import Base
 
 
@@ -17,7 +32,9 @@ class Document(Base):
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
     filename: Mapped[str] = mapped_column(String(512), nullable=False)
-    meta = Column(JSONB, nullable=True)
+    meta: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
+    # Maintained by the writers of `chunks` (ingestion), so listings never aggregate chunks
+    chunk_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -25,7 +42,13 @@ class Document(Base):
     chunks: Mapped[list["Chunk"]] = relationship("Chunk", back_populates="document")
 
 
-Index("idx_documents_created_at", Document.created_at)
+Index("ix_documents_created_at", Document.created_at, Document.id)
+Index(
+    "ix_documents_filename_trgm",
+    Document.filename,
+    postgresql_using="gin",
+    postgresql_ops={"filename": "gin_trgm_ops"},
+)
 
 
 class Chunk(Base):
@@ -38,11 +61,99 @@ class Chunk(Base):
         UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False
     )
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    # sha256 of content; re-ingestion keeps chunks whose hash is unchanged
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
     page: Mapped[int | None] = mapped_column(nullable=True)
-    meta = Column(JSONB, nullable=True)
+    meta: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
+    # Filterable copies of meta["source"] / meta["section"], typed and indexed for search
+    source: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    section: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Full-text search vector; generated by Postgres, never loaded unless asked for
+    tsv = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{settings.fts_config}'::regconfig, content)", persisted=True),
+        deferred=True,
+    )
+    # Written in the same COPY as the row; NULL only for chunks whose vector was never stored
+    embedding = mapped_column(Vector(settings.embedding_dim), nullable=True, deferred=True)
 
     document: Mapped[Document] = relationship("Document", back_populates="chunks")
 
 
 Index("idx_chunks_document_id", Chunk.document_id)
+Index("ix_chunks_tsv", Chunk.tsv, postgresql_using="gin")
+Index("ix_chunks_source", Chunk.source)
+Index("ix_chunks_section", Chunk.section, postgresql_where=Chunk.section.isnot(None))
+# The ANN index on chunks.embedding (ix_chunks_embedding_ann) is managed by core.ann
+
+
+
+class Bm25Posting(Base):
+    __tablename__ = "bm25_postings"
+
+    term: Mapped[str] = mapped_column(Text, primary_key=True)
+    chunk_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("chunks.id", ondelete="CASCADE"), primary_key=True
+    )
+    tf: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+Index("ix_bm25_postings_chunk_id", Bm25Posting.chunk_id)
+
+
+class EmbeddingCache(Base):
+    __tablename__ = "embedding_cache"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(String(256), primary_key=True)
+    embedding = Column(Vector(), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+Index("ix_embedding_cache_created_at", EmbeddingCache.created_at)
+
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
 
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    # queued -> running -> succeeded | failed (running -> queued on retry)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")
+    stage: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    filename: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    result: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+Index("ix_ingest_jobs_status_run_after", IngestJob.status, IngestJob.run_after)
+
+
+class CorpusState(Base):
+    """Single row; `generation` is bumped whenever searchable content changes."""
+
+    __tablename__ = "corpus_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
+    generation: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.ann import ANN_METHODS, ann_index_status, build_ann_index, drop_ann_index  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Manage the pgvector ANN index")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    build = sub.add_parser("build", help="(Re)build the index concurrently")
+    build.add_argument("--method", choices=ANN_METHODS, default=None)
+    build.add_argument("--m", type=int, default=None, help="HNSW max connections per node")
+    build.add_argument("--ef-construction", type=int, default=None, help="HNSW build beam width")
+    build.add_argument("--lists", type=int, default=None, help="IVFFlat list count")
+    sub.add_parser("drop", help="Drop the index (searches become exact)")
+    sub.add_parser("status", help="Show index definition and size")
+
+    args = parser.parse_args()
+    if args.cmd == "build":
+        ddl = build_ann_index(
+            args.method, m=args.m, ef_construction=args.ef_construction, lists=args.lists
+        )
+        print(ddl)
+    elif args.cmd == "drop":
+        drop_ann_index()
+    print(json.dumps(ann_index_status(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
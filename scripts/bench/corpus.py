@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import random
+from typing import List, Tuple
+
+# Small fixed vocabulary; word frequency follows a Zipf-like curve like real text
+_SYLLABLES = ["ka", "lo", "mi", "ter", "sun", "dra", "vel", "quo", "pen", "rix", "ba", "nor"]
+
+
+def _vocabulary(size: int, rng: random.Random) -> List[str]:
+    words: set[str] = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+
+def generate_corpus(
+    docs: int, paragraphs: int, seed: int = 0, vocab_size: int = 5000
+) -> List[Tuple[str, bytes]]:
+    """Deterministic synthetic text documents: [(filename, utf-8 bytes)]."""
+    rng = random.Random(seed)
+    vocab = _vocabulary(vocab_size, rng)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    out: List[Tuple[str, bytes]] = []
+    for d in range(docs):
+        paras = []
+        for p in range(paragraphs):
+            sentences = []
+            for _ in range(rng.randint(3, 8)):
+                words = rng.choices(vocab, weights=weights, k=rng.randint(6, 20))
+                sentences.append(" ".join(words).capitalize() + ".")
+            paras.append(f"Section {p + 1}. " + " ".join(sentences))
+        out.append((f"bench-{seed}-{d:06d}.txt", "\n\n".join(paras).encode("utf-8")))
+    return out
+
+
+def sample_queries(corpus: List[Tuple[str, bytes]], n: int, seed: int = 0) -> List[str]:
+    """Queries are short word spans taken from random documents, so every query has matches."""
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(n):
+        _, raw = rng.choice(corpus)
+        words = raw.decode("utf-8").split()
+        start = rng.randrange(max(1, len(words) - 6))
+        queries.append(" ".join(words[start : start + rng.randint(3, 6)]).strip(".,"))
+    return queries
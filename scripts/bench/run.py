@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""
+Offline benchmark: synthetic corpus -> ingest throughput and per-mode query latency.
+
+Uses the deterministic hash embedder and reranker (no model download) against the
+Postgres in DATABASE_URL, or an embedded one with --pgserver (`pip install pgserver`).
+Prints a JSON report; --out also writes it to a file for regression tracking.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from scripts.bench.corpus import generate_corpus, sample_queries  # noqa: E402
+from scripts.latency import percentile  # noqa: E402
+
+MODES = ("vector", "hybrid", "rerank")
+
+_pg_server: Any = None
+
+
+def latency_summary(samples_s: List[float], wall_s: float) -> Dict[str, float]:
+    ms = [s * 1000 for s in samples_s]
+    return {
+        "n": len(ms),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(sum(ms) / len(ms), 2) if ms else 0.0,
+        "qps": round(len(ms) / wall_s, 1) if wall_s else 0.0,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _configure_env(args: argparse.Namespace) -> None:
+    # Must run before any core module reads settings
+    if args.pgserver:
+        try:
+            import pgserver
+        except ImportError:
+            raise SystemExit("--pgserver needs the optional `pgserver` package")
+        global _pg_server  # keep the embedded server alive for the whole run
+        _pg_server = pgserver.get_server(args.pgserver, cleanup_mode="stop")
+        os.environ["DATABASE_URL"] = _pg_server.get_uri().replace(
+            "postgresql://", "postgresql+psycopg://"
+        )
+    if args.models == "hash":
+        os.environ["EMBEDDING_BACKEND"] = "hash"
+        os.environ["RERANK_BACKEND"] = "hash"
+    os.environ["EMBEDDING_DIM"] = str(args.dim)
+    # Measure the pipeline, not the caches
+    os.environ.setdefault("RESULT_CACHE_SIZE", "0")
+    os.environ.setdefault("QUERY_EMBEDDING_CACHE_SIZE", "0")
+    os.environ.setdefault("INGEST_WORKERS", "0")
+    os.environ.setdefault("ENABLE_METRICS", "false")
+
+
+def _migrate() -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    cfg = Config(str(ROOT / "db" / "alembic.ini"))
+    cfg.set_main_option("script_location", str(ROOT / "db" / "migrations"))
+    command.upgrade(cfg, "head")
+
+
+def _reset() -> None:
+    from sqlalchemy import text
+
+    from db.base import engine
+
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE documents, embedding_cache, ingest_jobs CASCADE"))
+
+
+def bench_ingest(corpus: List[tuple[str, bytes]], batch: int) -> Dict[str, Any]:
+    from core.ingestion import ingest_many
+
+    chunks = 0
+    t0 = time.perf_counter()
+    for i in range(0, len(corpus), batch):
+        items = [(name, raw, "text/plain") for name, raw in corpus[i : i + batch]]
+        chunks += ingest_many(items)["stats"]["chunks"]
+    elapsed = time.perf_counter() - t0
+    return {
+        "docs": len(corpus),
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "docs_per_s": round(len(corpus) / elapsed, 1),
+        "chunks_per_s": round(chunks / elapsed, 1),
+    }
+
+
+def bench_queries(queries: List[str], mode: str, top_k: int, warmup: int) -> Dict[str, float]:
+    from core.retrieval import RetrievalRequest, retrieve_many
+
+    def request(q: str) -> RetrievalRequest:
+        return RetrievalRequest(q, top_k, rerank=mode == "rerank", hybrid=mode == "hybrid")
+
+    for q in queries[:warmup]:
+        retrieve_many([request(q)])
+    samples: List[float] = []
+    t0 = time.perf_counter()
+    for q in queries:
+        t = time.perf_counter()
+        retrieve_many([request(q)])
+        samples.append(time.perf_counter() - t)
+    return latency_summary(samples, time.perf_counter() - t0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline ingest/query benchmark")
+    parser.add_argument("--docs", type=int, default=200, help="Synthetic documents")
+    parser.add_argument("--paragraphs", type=int, default=20, help="Paragraphs per document")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=50, help="Documents per ingest_many call")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed queries per mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument(
+        "--models",
+        choices=("hash", "configured"),
+        default="hash",
+        help="hash stand-ins (default) or the EMBEDDING_BACKEND/RERANK_BACKEND from env",
+    )
+    parser.add_argument("--pgserver", metavar="DIR", help="Run an embedded Postgres in DIR")
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Truncate corpus tables first (re-runs otherwise dedupe to 0 chunks)",
+    )
+    parser.add_argument("--skip-ingest", action="store_true", help="Query the existing corpus")
+    parser.add_argument("--out", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    _configure_env(args)
+    from core.settings import settings
+
+    _migrate()
+    if args.reset:
+        _reset()
+
+    corpus = generate_corpus(args.docs, args.paragraphs, seed=args.seed)
+    report: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "docs": args.docs,
+            "paragraphs": args.paragraphs,
+            "seed": args.seed,
+            "embedding_backend": settings.embedding_backend,
+            "rerank_backend": settings.rerank_backend,
+            "embedding_dim": settings.embedding_dim,
+            "chunk_size": settings.chunk_size,
+            "chunk_overlap": settings.chunk_overlap,
+            "ann_index": settings.ann_index,
+            "lexical_backend": settings.lexical_backend,
+            "hybrid_fusion": settings.hybrid_fusion,
+            "hybrid_topn": settings.hybrid_topn,
+            "top_k": args.top_k,
+        },
+    }
+    if not args.skip_ingest:
+        report["ingest"] = bench_ingest(corpus, args.batch)
+    queries = sample_queries(corpus, args.queries, seed=args.seed)
+    report["query"] = {
+        mode: bench_queries(queries, mode, args.top_k, args.warmup) for mode in args.modes
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,17 +1,23 @@
 #!/usr/bin/env python
 from __future__ import annotations
 
+import argparse
+import asyncio
 import csv
 import os
 import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Tuple
 
 import httpx
 import yaml
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from scripts.latency import percentile  # noqa: E402
 
 API = os.getenv("API_URL", "http://localhost:8000")
 TOP_K = int(os.getenv("EVAL_TOP_K", os.getenv("TOP_K", "5")))
@@ -39,50 +45,167 @@ def metrics_at_k(ranked_texts: List[str], expected_contains: str) -> Dict[str, f
     return {"hit@k": hit, "mrr": mrr, "ndcg": ndcg}
 
 
+async def run_load(
+    cases: List[Dict[str, Any]], concurrency: int, qps: float, rounds: int
+) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Post every fixture `rounds` times with at most `concurrency` requests in flight.
+    With `qps` > 0, request i is due at start + i/qps (open-loop pacing) and its latency
+    counts from that time, so waiting for a free slot behind slow requests is included
+    rather than omitted. Requests bypass the server's result cache, so repeated rounds
+    measure retrieval. Returns one record per request (case index, latency, status,
+    results) and wall time.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    schedule = [i for _ in range(max(1, rounds)) for i in range(len(cases))]
+    records: List[Dict[str, Any]] = []
+
+    async def one(client: httpx.AsyncClient, n: int, case_idx: int, t_start: float) -> None:
+        if qps > 0:
+            t0 = t_start + n / qps
+            delay = t0 - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        async with sem:
+            if qps <= 0:
+                t0 = time.perf_counter()
+            record: Dict[str, Any] = {"case": case_idx, "round": n // len(cases)}
+            try:
+                resp = await client.post(
+                    f"{API}/query",
+                    json={"query": cases[case_idx]["query"], "top_k": TOP_K, "cache": False},
+                )
+                record["status"] = resp.status_code
+                if resp.is_success:
+                    record["results"] = resp.json().get("results", [])
+            except httpx.HTTPError as e:
+                record["status"] = 0
+                record["error"] = type(e).__name__
+            record["latency_ms"] = (time.perf_counter() - t0) * 1000
+            records.append(record)
+
+    limits = httpx.Limits(max_connections=max(1, concurrency))
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        t_start = time.perf_counter()
+        await asyncio.gather(*(one(client, n, i, t_start) for n, i in enumerate(schedule)))
+        wall = time.perf_counter() - t_start
+    return records, wall
+
+
+def load_summary(records: List[Dict[str, Any]], wall: float) -> Dict[str, float]:
+    ok = [r["latency_ms"] for r in records if "results" in r]
+    errors = len(records) - len(ok)
+    return {
+        "requests": len(records),
+        "errors": errors,
+        "error_rate": errors / len(records) if records else 0.0,
+        "duration_s": wall,
+        "throughput_rps": len(records) / wall if wall else 0.0,
+        "p50_ms": percentile(ok, 50),
+        "p95_ms": percentile(ok, 95),
+        "p99_ms": percentile(ok, 99),
+        "mean_ms": sum(ok) / len(ok) if ok else 0.0,
+    }
+
+
 def main() -> int:
+    parser = argparse.ArgumentParser(description="Relevance eval, optionally under load")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("EVAL_CONCURRENCY", "1")),
+        help="Requests in flight (default 1: sequential)",
+    )
+    parser.add_argument(
+        "--qps",
+        type=float,
+        default=float(os.getenv("EVAL_QPS", "0")),
+        help="Target request rate; 0 sends as fast as concurrency allows",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=int(os.getenv("EVAL_ROUNDS", "1")),
+        help="Times each fixture is sent; quality uses the first successful response",
+    )
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=float(os.getenv("EVAL_MAX_ERROR_RATE", "0")),
+        help="Exit non-zero above this fraction of failed requests (default 0)",
+    )
+    args = parser.parse_args()
+
     fixtures = Path("tests/eval/fixtures.yaml")
     if not fixtures.exists():
         print("fixtures not found", file=sys.stderr)
         return 1
     data = yaml.safe_load(fixtures.read_text())
 
+    records, wall = asyncio.run(run_load(data, args.concurrency, args.qps, args.rounds))
+    load = load_summary(records, wall)
+
+    # Quality per fixture from its first successful response
+    first_ok: Dict[int, Dict[str, Any]] = {}
+    for r in sorted(records, key=lambda r: r["round"]):
+        if "results" in r:
+            first_ok.setdefault(r["case"], r)
+
     rows: List[Dict[str, str]] = []
     summary = {"hit@k": 0.0, "mrr": 0.0, "ndcg": 0.0, "n": 0}
-
-    with httpx.Client(timeout=30) as client:
-        for case in data:
-            q = case["query"]
-            expect = case["expect"].get("contains")
-            resp = client.post(f"{API}/query", json={"query": q, "top_k": TOP_K})
-            resp.raise_for_status()
-            results = resp.json().get("results", [])
-            texts = [r.get("text", "") for r in results]
-            m = metrics_at_k(texts, expect)
-            summary["hit@k"] += m["hit@k"]
-            summary["mrr"] += m["mrr"]
-            summary["ndcg"] += m["ndcg"]
-            summary["n"] += 1
-            rows.append({"query": q, **{k: str(v) for k, v in m.items()}})
+    for idx, case in enumerate(data):
+        q = case["query"]
+        rec = first_ok.get(idx)
+        if rec is None:
+            rows.append({"query": q, "hit@k": "", "mrr": "", "ndcg": "", "latency_ms": ""})
+            continue
+        texts = [r.get("text", "") for r in rec["results"]]
+        m = metrics_at_k(texts, case["expect"].get("contains"))
+        summary["hit@k"] += m["hit@k"]
+        summary["mrr"] += m["mrr"]
+        summary["ndcg"] += m["ndcg"]
+        summary["n"] += 1
+        rows.append(
+            {
+                "query": q,
+                **{k: str(v) for k, v in m.items()},
+                "latency_ms": f"{rec['latency_ms']:.1f}",
+            }
+        )
 
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     reports = Path("reports")
     reports.mkdir(exist_ok=True)
     csv_path = reports / f"eval_{ts}.csv"
     with csv_path.open("w", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=["query", "hit@k", "mrr", "ndcg"])
+        w = csv.DictWriter(f, fieldnames=["query", "hit@k", "mrr", "ndcg", "latency_ms"])
         w.writeheader()
         w.writerows(rows)
 
-    avg = {k: (summary[k] / summary["n"] if summary["n"] else 0.0) for k in ("hit@k", "mrr", "ndcg")}
+    avg = {
+        k: (summary[k] / summary["n"] if summary["n"] else 0.0) for k in ("hit@k", "mrr", "ndcg")
+    }
     md_path = reports / "summary.md"
     md_path.write_text(
         f"# Eval Summary\n\nN={summary['n']} TOP_K={TOP_K}\n\n"
         f"- hit@k: {avg['hit@k']:.3f}\n- MRR: {avg['mrr']:.3f}\n- nDCG: {avg['ndcg']:.3f}\n"
+        f"\n## Load\n\n"
+        f"concurrency={args.concurrency} target_qps={args.qps or 'unbounded'} "
+        f"rounds={args.rounds}\n\n"
+        f"- requests: {load['requests']} (errors: {load['errors']}, "
+        f"error rate: {load['error_rate']:.2%})\n"
+        f"- throughput: {load['throughput_rps']:.1f} req/s over {load['duration_s']:.1f}s\n"
+        f"- latency p50/p95/p99: {load['p50_ms']:.1f} / {load['p95_ms']:.1f} / "
+        f"{load['p99_ms']:.1f} ms (mean {load['mean_ms']:.1f} ms)\n"
     )
     print(f"Wrote {csv_path} and {md_path}")
+    if load["error_rate"] > args.max_error_rate:
+        print(
+            f"error rate {load['error_rate']:.2%} above {args.max_error_rate:.2%}", file=sys.stderr
+        )
+        return 1
     return 0
 
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
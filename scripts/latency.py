@@ -0,0 +1,15 @@
+"""Latency statistics shared by scripts/eval.py and scripts/bench/run.py."""
+
+from __future__ import annotations
+
+import math
+from typing import List
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of `values` (p in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(p / 100.0 * len(ordered))))
+    return ordered[rank - 1]
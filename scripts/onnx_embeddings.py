@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.embeddings import build_embeddings  # noqa: E402
+from core.onnx_embeddings import FP32_MODEL, quantize_model  # noqa: E402
+from core.settings import settings  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "FastAPI is a modern web framework for building APIs with Python type hints.",
+    "PostgreSQL stores vectors with the pgvector extension and indexes them with HNSW.",
+    "Reciprocal rank fusion combines ranked lists without calibrating their scores.",
+    "The ingestion pipeline parses, chunks, embeds and stores uploaded documents.",
+    "Int8 dynamic quantization shrinks weights and speeds up CPU inference.",
+    "What is the maximum upload size?",
+    "Как настроить гибридный поиск?",
+    "短い日本語の文です。",
+]
+
+
+def export(model_name: str, out_dir: Path, quantize: bool) -> None:
+    """Export the Hugging Face encoder to ONNX (last_hidden_state) with its tokenizer."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "sequence"} for n in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in names),
+            str(out_dir / FP32_MODEL),
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=17,
+        )
+    tokenizer.save_pretrained(str(out_dir))
+    if quantize:
+        quantize_model(out_dir)
+
+
+def _throughput(emb: Embeddings, texts: list[str], rounds: int) -> tuple[np.ndarray, float]:
+    vectors = np.array(emb.embed_documents(texts))
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        emb.embed_documents(texts)
+    return vectors, len(texts) * rounds / (time.perf_counter() - t0)
+
+
+def parity(texts: list[str], rounds: int, threshold: float) -> int:
+    """Cosine similarity of ONNX vs PyTorch vectors for the same texts, plus throughput."""
+    ref, ref_tps = _throughput(build_embeddings("torch"), texts, rounds)
+    onnx, onnx_tps = _throughput(build_embeddings("onnx"), texts, rounds)
+    cos = np.sum(ref * onnx, axis=1)  # both backends return unit vectors
+    report = {
+        "texts": len(texts),
+        "quantized": settings.onnx_quantize,
+        "cosine_min": round(float(cos.min()), 5),
+        "cosine_mean": round(float(cos.mean()), 5),
+        "torch_texts_per_s": round(ref_tps, 1),
+        "onnx_texts_per_s": round(onnx_tps, 1),
+        "speedup": round(onnx_tps / ref_tps, 2),
+        "threshold": threshold,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if cos.min() >= threshold else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="ONNX embedding backend tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    exp = sub.add_parser("export", help="Export EMBEDDING_MODEL to ONNX_MODEL_DIR")
+    exp.add_argument("--model", default=settings.embedding_model)
+    exp.add_argument("--out", default=settings.onnx_model_dir)
+    exp.add_argument("--no-quantize", action="store_true", help="Skip the int8 model")
+
+    par = sub.add_parser("parity", help="Compare ONNX vectors and speed against PyTorch")
+    par.add_argument("--file", help="Texts to embed, one per line (default: built-in sample)")
+    par.add_argument("--rounds", type=int, default=5, help="Timed passes over the texts")
+    par.add_argument("--threshold", type=float, default=0.99, help="Minimum cosine to pass")
+
+    args = parser.parse_args()
+    if args.cmd == "export":
+        export(args.model, Path(args.out), quantize=not args.no_quantize)
+        print(f"exported {args.model} to {args.out}")
+        return 0
+    texts = SAMPLE_TEXTS
+    if args.file:
+        texts = [line.strip() for line in Path(args.file).read_text().splitlines() if line.strip()]
+    return parity(texts, args.rounds, args.threshold)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
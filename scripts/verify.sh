@@ -42,9 +42,9 @@ curl -s -o "$OUT/resp_415.json" -w "%{http_code}\n" -F "file=@$OUT/bad.bin;type=
 
 echo "6) Ingest TXT/PDF/DOCX and idempotency" | tee -a "$OUT/steps.log"
 echo 'FastAPI is a modern, fast web framework for building APIs with Python.' > "$OUT/sample.txt"
-curl -s -F "file=@$OUT/sample.txt;type=text/plain" http://localhost:8000/ingest | tee "$OUT/ingest_txt_1.json"
+curl -s -F "file=@$OUT/sample.txt;type=text/plain" "http://localhost:8000/ingest?wait=true" | tee "$OUT/ingest_txt_1.json"
 DOC_ID=$(jq -r '.doc_id' "$OUT/ingest_txt_1.json")
-curl -s -F "file=@$OUT/sample.txt;type=text/plain" http://localhost:8000/ingest | tee "$OUT/ingest_txt_2.json"
+curl -s -F "file=@$OUT/sample.txt;type=text/plain" "http://localhost:8000/ingest?wait=true" | tee "$OUT/ingest_txt_2.json"
 
 # Create small PDF via PyMuPDF
 python - "$OUT/sample.pdf" <<'PY'
@@ -56,7 +56,7 @@ page.insert_text((72,72), "Sample PDF with Markdown mention.")
 doc.save(path)
 doc.close()
 PY
-curl -s -F "file=@$OUT/sample.pdf;type=application/pdf" http://localhost:8000/ingest | tee "$OUT/ingest_pdf.json"
+curl -s -F "file=@$OUT/sample.pdf;type=application/pdf" "http://localhost:8000/ingest?wait=true" | tee "$OUT/ingest_pdf.json"
 
 # Create DOCX
 python - "$OUT/sample.docx" <<'PY'
@@ -66,7 +66,7 @@ d = Document()
 d.add_paragraph("Hello DOCX world. This is a test document.")
 d.save(sys.argv[1])
 PY
-curl -s -F "file=@$OUT/sample.docx;type=application/vnd.openxmlformats-officedocument.wordprocessingml.document" http://localhost:8000/ingest | tee "$OUT/ingest_docx.json"
+curl -s -F "file=@$OUT/sample.docx;type=application/vnd.openxmlformats-officedocument.wordprocessingml.document" "http://localhost:8000/ingest?wait=true" | tee "$OUT/ingest_docx.json"
 
 echo "7) Documents pagination and search" | tee -a "$OUT/steps.log"
 curl -s "http://localhost:8000/documents?limit=5&offset=0" | tee "$OUT/documents_page1.json"
@@ -13,7 +13,7 @@ def main() -> int:
     with httpx.Client(timeout=60) as client:
         for name, data in docs:
             files = {"file": (name, data, "text/plain")}
-            r = client.post(f"{api}/ingest", files=files)
+            r = client.post(f"{api}/ingest?wait=true", files=files)
             r.raise_for_status()
     return 0
 
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+import core.vectorstore as vs
+from core.ann import ANN_INDEX_NAME, index_ddl
+
+
+def test_hnsw_ddl_uses_cosine_opclass_and_settings(monkeypatch):
+    monkeypatch.setattr("core.ann.settings.hnsw_m", 24)
+    monkeypatch.setattr("core.ann.settings.hnsw_ef_construction", 128)
+    assert index_ddl("hnsw") == (
+        f"CREATE INDEX IF NOT EXISTS {ANN_INDEX_NAME} ON chunks "
+        "USING hnsw (embedding vector_cosine_ops) WITH (m = 24, ef_construction = 128)"
+    )
+
+
+def test_ivfflat_ddl_and_overrides():
+    ddl = index_ddl("ivfflat", lists=256, concurrently=True)
+    assert ddl.startswith(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {ANN_INDEX_NAME} ON chunks ")
+    assert ddl.endswith("USING ivfflat (embedding vector_cosine_ops) WITH (lists = 256)")
+    assert "WITH (m = 8, ef_construction = 200)" in index_ddl("hnsw", m=8, ef_construction=200)
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        index_ddl("diskann")
+
+
+class _RecordingConn:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, stmt, params=None):
+        self.calls.append((str(stmt), params or {}))
+        return SimpleNamespace(all=lambda: [])
+
+
+def _knob_calls(conn):
+    return [(sql, p) for sql, p in conn.calls if "set_config" in sql]
+
+
+def test_query_knobs_are_transaction_local(monkeypatch):
+    monkeypatch.setattr(vs, "_iterative_scan_supported", lambda conn: False)
+    monkeypatch.setattr(vs.settings, "hnsw_ef_search", 40)
+    monkeypatch.setattr(vs.settings, "ivfflat_probes", 10)
+    conn = _RecordingConn()
+    vs._search(conn, vs.VectorSearch([0.1, 0.2], k=5))
+    vs._search(conn, vs.VectorSearch([0.1, 0.2], k=5, ef_search=200, probes=32))
+    # HNSW returns at most ef_search rows, so ef_search never drops below k
+    vs._search(conn, vs.VectorSearch([0.1, 0.2], k=100, ef_search=20))
+
+    calls = _knob_calls(conn)
+    assert len(calls) == 3
+    for sql, _ in calls:
+        # is_local = true: SET LOCAL semantics, nothing leaks to the pooled connection
+        assert "set_config('hnsw.ef_search', :ef_search, true)" in sql
+        assert "set_config('ivfflat.probes', :probes, true)" in sql
+    assert [(p["ef_search"], p["probes"]) for _, p in calls] == [
+        ("40", "10"),
+        ("200", "32"),
+        ("100", "10"),
+    ]
+
+
+def test_iterative_scan_only_for_filtered_ann(monkeypatch):
+    monkeypatch.setattr(vs, "_iterative_scan_supported", lambda conn: True)
+    monkeypatch.setattr(vs.settings, "vector_iterative_scan", "strict_order")
+    monkeypatch.setattr(vs.settings, "hnsw_max_scan_tuples", 5000)
+    plans = iter(["exact", "filtered_ann"])
+    monkeypatch.setattr(vs, "plan_search", lambda conn, clauses, params: next(plans))
+    conn = _RecordingConn()
+    vs._search(conn, vs.VectorSearch([0.1], k=5, metadata_filter={"source": "pdf"}))
+    vs._search(conn, vs.VectorSearch([0.1], k=5, metadata_filter={"source": "pdf"}))
+
+    scans = [p for sql, p in _knob_calls(conn) if "iterative_scan" in sql]
+    assert "set_config('hnsw.iterative_scan', :hnsw_scan, true)" in _knob_calls(conn)[1][0]
+    assert scans == [
+        {"hnsw_scan": "off", "max_scan_tuples": "5000", "ivfflat_scan": "off"},
+        {"hnsw_scan": "strict_order", "max_scan_tuples": "5000", "ivfflat_scan": "relaxed_order"},
+    ]
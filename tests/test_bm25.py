@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import uuid
+
+import pytest
+
+from core.bm25 import BM25Index, term_frequencies
+
+
+def _index() -> BM25Index:
+    idx = BM25Index()
+    idx.add_text("a", "fastapi is a python web framework")
+    idx.add_text("b", "postgres stores vectors with pgvector")
+    idx.add_text("c", "python python scripts for data")
+    return idx
+
+
+def test_top_n_ranks_over_whole_corpus():
+    idx = _index()
+    ranked = idx.top_n("python framework", 10)
+    assert [cid for cid, _ in ranked][:2] == ["a", "c"]
+    assert all(cid != "b" for cid, _ in ranked)
+
+
+def test_scores_by_id_match_text_scoring():
+    idx = _index()
+    by_id = idx.scores("python", ["a", "c", "missing"])
+    assert set(by_id) == {"a", "c"}
+    assert abs(by_id["a"] - idx.score_text("python", "fastapi is a python web framework")) < 1e-9
+
+
+def test_remove_and_readd_keep_stats_consistent():
+    idx = _index()
+    before = idx.scores("python", ["c"])["c"]
+    idx.remove("a")
+    assert "a" not in idx and len(idx) == 2
+    assert idx.top_n("fastapi", 5) == []
+    idx.add("a", term_frequencies("fastapi is a python web framework"))
+    idx.add("a", term_frequencies("fastapi is a python web framework"))
+    assert len(idx) == 3
+    assert abs(idx.scores("python", ["c"])["c"] - before) < 1e-9
+
+
+def test_changes_committed_during_first_load_are_replayed(monkeypatch):
+    from core import bm25
+
+    def load_while_ingesting(session):
+        # Snapshot taken before the concurrent ingest and delete commit
+        idx = _index()
+        bm25.update_bm25_index({"d": term_frequencies("python packaging guide")})
+        bm25.remove_from_bm25_index(["b"])
+        return idx
+
+    monkeypatch.setattr(bm25, "_index", None)
+    monkeypatch.setattr(bm25, "SessionLocal", lambda: contextlib.nullcontext())
+    monkeypatch.setattr(bm25, "load_index", load_while_ingesting)
+    idx = bm25.get_bm25_index()
+    assert "d" in idx and "b" not in idx
+    assert bm25._pending is None
+
+    bm25.update_bm25_index({"e": term_frequencies("late python chunk")})
+    assert "e" in bm25.get_bm25_index()
+
+
+def test_top_n_can_be_restricted_to_allowed_ids():
+    idx = _index()
+    assert [cid for cid, _ in idx.top_n("python", 1)] == ["c"]
+    assert [cid for cid, _ in idx.top_n("python", 1, allowed={"a", "b"})] == ["a"]
+    assert idx.top_n("python", 5, allowed=set()) == []
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(
+    not os.getenv("DATABASE_URL", "").startswith("postgresql"), reason="Postgres required"
+)
+@pytest.mark.parametrize("exact_max_rows", [5000, 0])
+def test_filtered_bm25_candidates_are_not_crowded_out(monkeypatch, exact_max_rows):
+    from sqlalchemy import delete
+
+    from core import retrieval
+    from core.embedding_cache import content_hash
+    from db.base import SessionLocal
+    from db.models import Chunk, Document
+
+    # Twenty unfiltered chunks outrank the only one that passes source="pdf"
+    texts = [("python python python tips", "txt")] * 20 + [("python once", "pdf")]
+    with SessionLocal() as session:
+        doc = Document(filename=f"bm25-filter-{uuid.uuid4()}.txt", meta={})
+        session.add(doc)
+        session.flush()
+        chunks = [
+            Chunk(
+                document_id=doc.id,
+                content=t,
+                content_hash=content_hash(t),
+                meta={},
+                source=source,
+            )
+            for t, source in texts
+        ]
+        session.add_all(chunks)
+        session.commit()
+        chunk_ids = [str(c.id) for c in chunks]
+        doc_id = doc.id
+    idx = BM25Index()
+    for cid, (t, _) in zip(chunk_ids, texts, strict=True):
+        idx.add_text(cid, t)
+    monkeypatch.setattr(retrieval, "get_bm25_index", lambda: idx)
+    # 5000: the filtered set is ranked directly; 0: the global ranking is paged through
+    monkeypatch.setattr(retrieval.settings, "exact_search_max_rows", exact_max_rows)
+    monkeypatch.setattr(retrieval, "BM25_FILTER_PAGE", 8)
+    try:
+        hits = retrieval._bm25_candidates("python", 5, {"source": "pdf"})
+        assert [h["chunk_id"] for h in hits] == [chunk_ids[-1]]
+        assert hits[0]["source"] == "pdf" and hits[0]["doc_id"] == str(doc_id)
+        unfiltered = retrieval._bm25_candidates("python", 5, None)
+        assert len(unfiltered) == 5 and chunk_ids[-1] not in {h["chunk_id"] for h in unfiltered}
+    finally:
+        with SessionLocal() as session:
+            session.execute(delete(Document).where(Document.id == doc_id))
+            session.commit()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import os
+import tarfile
+import uuid
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.routers.ingest as ingest_router
+import core.ingestion as ingestion
+from app.main import app
+from core.ingestion import UploadTooLarge, expand_archive, is_archive
+
+
+def _zip(files: dict[str, bytes]) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def _tgz(files: dict[str, bytes]) -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def test_expand_zip_and_tar_archives():
+    files = {"a.txt": b"alpha", "docs/b.txt": b"beta"}
+    assert is_archive("corpus.ZIP") and is_archive("corpus.tar.gz") and not is_archive("a.txt")
+    for name, data in (("c.zip", _zip(files)), ("c.tgz", _tgz(files))):
+        items = expand_archive(name, data, max_bytes=1024, max_total_bytes=4096)
+        # Members are read lazily through their payload callables
+        assert sorted((n, read()) for n, read, _ in items) == sorted(files.items())
+
+
+def test_expand_archive_enforces_limits():
+    data = _zip({"a.txt": b"x" * 100, "b.txt": b"y" * 100})
+    with pytest.raises(UploadTooLarge):
+        expand_archive("c.zip", data, max_bytes=50, max_total_bytes=4096)
+    with pytest.raises(UploadTooLarge):
+        expand_archive("c.zip", data, max_bytes=1024, max_total_bytes=150)
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(
+    not os.getenv("DATABASE_URL", "").startswith("postgresql"), reason="Postgres required"
+)
+def test_bulk_ingest_reports_per_file_results():
+    client = TestClient(app)
+    archive = _zip({"bulk1.txt": b"Bulk ingest one.", "bulk2.txt": b"Bulk ingest two."})
+    files = [
+        ("files", ("bulk.zip", archive, "application/zip")),
+        ("files", ("bulk1-copy.txt", b"Bulk ingest one.", "text/plain")),
+        ("files", ("bad.bin", b"\x00", "application/octet-stream")),
+    ]
+    r = client.post("/ingest/bulk", files=files)
+    assert r.status_code == 200, r.text
+    statuses = {x["filename"]: x["status"] for x in r.json()["results"]}
+    assert statuses["bulk1-copy.txt"] == "duplicate"
+    assert statuses["bad.bin"] == "failed"
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(
+    not os.getenv("DATABASE_URL", "").startswith("postgresql"), reason="Postgres required"
+)
+def test_bulk_ingest_race_with_single_upload_is_a_duplicate_not_an_error(monkeypatch):
+    raced = f"Raced upload {uuid.uuid4()}.".encode()
+    other = f"Other upload {uuid.uuid4()}.".encode()
+    embed = ingestion.embed_chunks
+    calls = []
+
+    def embed_while_single_upload_commits(texts):
+        calls.append(len(texts))
+        vectors = embed(texts)
+        if len(calls) == 1:
+            # A concurrent /ingest of the same bytes commits between dedupe and COPY
+            sha = hashlib.sha256(raced).hexdigest()
+            ingestion.ingest_bytes(raced, "raced-single.txt", "txt", sha)
+        return vectors
+
+    monkeypatch.setattr(ingestion, "embed_chunks", embed_while_single_upload_commits)
+    out = ingestion.ingest_many(
+        [("raced.txt", raced, "text/plain"), ("other.txt", other, "text/plain")]
+    )
+    statuses = {r["filename"]: r for r in out["results"]}
+    assert statuses["raced.txt"]["status"] == "duplicate"
+    assert statuses["raced.txt"]["doc_id"]
+    assert statuses["other.txt"]["status"] == "ingested"
+    assert out["stats"]["ingested"] == 1 and out["stats"]["duplicates"] == 1
+
+
+def test_bulk_endpoint_expands_archives_off_the_event_loop(monkeypatch):
+    calls = []
+
+    def expand(filename, data, max_bytes, max_total_bytes):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event loop")
+        except RuntimeError:
+            calls.append("worker thread")
+        return [("a.txt", lambda: b"alpha", None)]
+
+    monkeypatch.setattr(ingest_router, "expand_archive", expand)
+    monkeypatch.setattr(
+        ingest_router, "ingest_many", lambda items: {"results": [n for n, _, _ in items]}
+    )
+    client = TestClient(app)
+    r = client.post("/ingest/bulk", files=[("files", ("c.tgz", _tgz({"a.txt": b"alpha"})))])
+    assert r.status_code == 200, r.text
+    assert r.json() == {"results": ["a.txt"]}
+    assert calls == ["worker thread"]
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import core.embeddings as embeddings_mod
+from core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_evicts_lru_and_expires():
+    clock = FakeClock()
+    cache: TTLCache[int] = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" becomes least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_ttl_cache_disabled_with_zero_size():
+    cache: TTLCache[int] = TTLCache(maxsize=0, ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+class FakeEmbeddings:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls.append(text)
+        return [float(len(text))]
+
+
+def test_embed_query_hits_cache_for_normalized_text(monkeypatch):
+    fake = FakeEmbeddings()
+    monkeypatch.setattr(embeddings_mod, "get_embeddings", lambda: fake)
+    monkeypatch.setattr(embeddings_mod, "_query_cache", TTLCache(maxsize=8, ttl=60))
+
+    v1 = embeddings_mod.embed_query("what is  FastAPI?")
+    v2 = embeddings_mod.embed_query(" what is FastAPI? ")
+    assert v1 == v2 == [16.0]
+    assert fake.calls == ["what is FastAPI?"]
+
+
+class FakeBatchEmbeddings(FakeEmbeddings):
+    query_instruction = "Q: "
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: list[list[str]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+def test_embed_queries_batches_misses_once(monkeypatch):
+    fake = FakeBatchEmbeddings()
+    monkeypatch.setattr(embeddings_mod, "get_embeddings", lambda: fake)
+    monkeypatch.setattr(embeddings_mod, "_query_cache", TTLCache(maxsize=8, ttl=60))
+
+    embeddings_mod.embed_query("cached")
+    vectors = embeddings_mod.embed_queries(["ab", "cached", "abc", " ab "])
+    assert vectors == [[5.0], [6.0], [6.0], [5.0]]
+    # One model call for the distinct misses, with the query instruction
+    assert fake.batches == [["Q: ab", "Q: abc"]]
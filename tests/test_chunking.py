@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from typing import List
+
+import pytest
+
 from core.chunking import chunk_pages
 
 
@@ -15,3 +19,57 @@ def test_token_based_chunking_is_stable_by_spaces():
     # Token-based splitter should produce roughly similar counts regardless of whitespace distribution
     assert abs(len(chunks_a) - len(chunks_b)) <= 2
 
+
+def _require_tokenizer():
+    from core.chunking import _encoding
+
+    try:
+        _encoding()
+    except Exception as e:  # tokenizer files are downloaded on first use
+        pytest.skip(f"tiktoken encoding unavailable: {e}")
+
+
+def test_splitter_is_cached_per_configuration():
+    _require_tokenizer()
+    from core.chunking import get_splitter
+
+    assert get_splitter(200, 50) is get_splitter(200, 50)
+    assert get_splitter(200, 50) is not get_splitter(300, 50)
+
+
+def test_chunks_carry_exact_token_counts_in_page_order():
+    _require_tokenizer()
+    from core.chunking import count_tokens
+
+    pages = [
+        {"content": f"page {i} " + "word " * 300, "page": i, "meta": {"source": "pdf"}}
+        for i in range(1, 6)
+    ]
+    chunks = chunk_pages(pages, chunk_size=100, chunk_overlap=10)
+    assert [c["page"] for c in chunks] == sorted(c["page"] for c in chunks)
+    for c in chunks:
+        assert c["meta"]["source"] == "pdf"
+        assert c["meta"]["tokens"] == count_tokens(c["content"])
+        assert c["meta"]["tokens"] <= 100
+
+
+def test_each_text_is_encoded_once(monkeypatch):
+    import core.chunking as chunking
+
+    encoded: List[str] = []
+
+    class _Words:
+        def encode(self, text, disallowed_special=()):
+            encoded.append(text)
+            return text.split()
+
+    monkeypatch.setattr(chunking, "_encoding", lambda: _Words())
+    chunking.count_tokens.cache_clear()
+    try:
+        pages = [{"content": "word " * 500, "page": 1, "meta": {}}]
+        chunks = chunk_pages(pages, chunk_size=37, chunk_overlap=5)
+        assert len(chunks) > 1
+        assert all(c["meta"]["tokens"] <= 37 for c in chunks)
+        assert len(encoded) == len(set(encoded))
+    finally:
+        chunking.count_tokens.cache_clear()
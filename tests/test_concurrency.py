@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from app.concurrency import run_in_query_pool
+from core.logging import request_id_ctx
+
+
+def test_query_pool_runs_off_loop_and_keeps_request_id():
+    def work(x: int) -> tuple[int, str, str]:
+        return x * 2, request_id_ctx.get(), threading.current_thread().name
+
+    async def main() -> tuple[int, str, str]:
+        request_id_ctx.set("rid-123")
+        return await run_in_query_pool(work, 21)
+
+    value, rid, thread_name = asyncio.run(main())
+    assert value == 42
+    assert rid == "rid-123"
+    assert thread_name.startswith("query")
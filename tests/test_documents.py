@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers.documents import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 18, 12, 30, 1, 123456, tzinfo=timezone.utc)
+    doc_id = uuid.uuid4()
+    cursor = encode_cursor(created_at, doc_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, doc_id)
+
+
+@pytest.mark.parametrize("cursor", ["garbage!", "bm90LWEtY3Vyc29y", ""])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
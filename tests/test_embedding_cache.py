@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+import core.embedding_cache as embedding_cache
+from core.embedding_cache import content_hash
+from db.base import SessionLocal
+
+
+class _FakeSession:
+    """Stands in for SessionLocal(): the select returns cached rows, the insert stores rows."""
+
+    def __init__(self, state):
+        self.state = state
+
+    def __enter__(self):
+        self.state["open"] += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.state["open"] -= 1
+
+    def execute(self, stmt, params=None):
+        if params is None:
+            return SimpleNamespace(all=lambda: list(self.state["table"].items()))
+        for row in params:
+            self.state["table"].setdefault(row["content_hash"], row["embedding"])
+        return SimpleNamespace()
+
+    def commit(self):
+        self.state["commits"] += 1
+
+
+def _setup(monkeypatch):
+    state = {"table": {}, "open": 0, "commits": 0, "embedded": []}
+
+    def embed_documents(texts):
+        # The lookup session must be closed before the model runs
+        assert state["open"] == 0
+        state["embedded"].append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    monkeypatch.setattr(embedding_cache, "SessionLocal", lambda: _FakeSession(state))
+    monkeypatch.setattr(
+        embedding_cache, "get_embeddings", lambda: SimpleNamespace(embed_documents=embed_documents)
+    )
+    monkeypatch.setattr(embedding_cache, "embedding_model_id", lambda: "test-model")
+    monkeypatch.setattr(embedding_cache.settings, "embedding_cache_enabled", True)
+    monkeypatch.setattr(embedding_cache.settings, "embedding_cache_max_rows", 0)
+    return state
+
+
+def test_only_misses_reach_the_model(monkeypatch):
+    state = _setup(monkeypatch)
+    state["table"][content_hash("cached")] = [9.0, 9.0]
+
+    vectors = embedding_cache.embed_documents_cached(["cached", "new", "new", "other"])
+
+    assert state["embedded"] == [["new", "other"]]
+    assert vectors == [[9.0, 9.0], [3.0, 1.0], [3.0, 1.0], [5.0, 1.0]]
+    assert set(state["table"]) == {content_hash(t) for t in ("cached", "new", "other")}
+    assert state["commits"] == 1
+
+
+def test_all_hits_skip_the_model_and_the_write(monkeypatch):
+    state = _setup(monkeypatch)
+    embedding_cache.embed_documents_cached(["a", "b"])
+    vectors = embedding_cache.embed_documents_cached(["b", "a"])
+
+    assert state["embedded"] == [["a", "b"]]
+    assert vectors == [[1.0, 1.0], [1.0, 1.0]]
+    assert state["commits"] == 1
+
+
+class _PruneSession:
+    def __init__(self, estimate):
+        self.estimate = estimate
+        self.statements = []
+
+    def execute(self, stmt, params=None):
+        self.statements.append(str(stmt))
+        return SimpleNamespace(scalar_one=lambda: self.estimate, rowcount=3)
+
+
+def test_prune_treats_an_unanalyzed_table_as_over_the_cap():
+    fresh = _PruneSession(estimate=-1)
+    assert embedding_cache.prune_embedding_cache(fresh, max_rows=10) == 3
+    assert fresh.statements[-1].startswith("DELETE")
+    under = _PruneSession(estimate=10)
+    assert embedding_cache.prune_embedding_cache(under, max_rows=10) == 0
+    assert len(under.statements) == 1
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(
+    not os.getenv("DATABASE_URL", "").startswith("postgresql"), reason="Postgres required"
+)
+def test_prune_keeps_exactly_max_rows_when_created_at_ties():
+    with SessionLocal() as session:
+        # Newest rows, all written by one transaction: they share created_at
+        session.execute(
+            text(
+                "INSERT INTO embedding_cache (content_hash, model, embedding, created_at) "
+                "SELECT md5(random()::text || g), 'prune-test', '[1,2,3]', "
+                "'2999-01-01'::timestamptz FROM generate_series(1, 3) g"
+            )
+        )
+        session.execute(text("ANALYZE embedding_cache"))
+        embedding_cache.prune_embedding_cache(session, max_rows=2)
+        left = session.execute(
+            text("SELECT model, count(*) FROM embedding_cache GROUP BY model")
+        ).all()
+        # Everything else in the table is older and goes; rolled back below
+        assert [tuple(r) for r in left] == [("prune-test", 2)]
+        session.rollback()
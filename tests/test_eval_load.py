@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from functools import partial
+
+import httpx
+import scripts.eval as eval_script
+from scripts.latency import percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([3.0, 1.0, 2.0], 0) == 1.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_load_summary_counts_errors_and_excludes_them_from_latency():
+    records = [
+        {"case": 0, "round": 0, "status": 200, "results": [], "latency_ms": 10.0},
+        {"case": 1, "round": 0, "status": 200, "results": [], "latency_ms": 30.0},
+        {"case": 0, "round": 1, "status": 503, "latency_ms": 1.0},
+        {"case": 1, "round": 1, "status": 0, "error": "ConnectError", "latency_ms": 5000.0},
+    ]
+    summary = eval_script.load_summary(records, wall=2.0)
+    assert summary["requests"] == 4 and summary["errors"] == 2
+    assert summary["error_rate"] == 0.5
+    assert summary["throughput_rps"] == 2.0
+    assert (summary["p50_ms"], summary["p99_ms"], summary["mean_ms"]) == (10.0, 30.0, 20.0)
+    empty = eval_script.load_summary([], wall=0.0)
+    assert empty["error_rate"] == 0.0 and empty["throughput_rps"] == 0.0
+
+
+def test_metrics_at_k_scores_the_first_relevant_rank(monkeypatch):
+    monkeypatch.setattr(eval_script, "TOP_K", 3)
+    m = eval_script.metrics_at_k(["nothing", "has the Answer", "answer again"], "answer")
+    assert m["hit@k"] == 1.0 and m["mrr"] == 0.5
+    assert eval_script.metrics_at_k(["a", "b", "c", "answer"], "answer")["hit@k"] == 0.0
+
+
+def test_open_loop_latency_counts_from_the_scheduled_send(monkeypatch):
+    bodies = []
+
+    async def slow_api(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"results": []})
+
+    transport = httpx.MockTransport(slow_api)
+    monkeypatch.setattr(
+        eval_script.httpx, "AsyncClient", partial(httpx.AsyncClient, transport=transport)
+    )
+    cases = [{"query": "q1"}, {"query": "q2"}]
+    # One slot, both due almost at once: the second waits ~50ms behind the first
+    records, wall = asyncio.run(eval_script.run_load(cases, concurrency=1, qps=1000, rounds=1))
+    assert all(b["cache"] is False for b in bodies) and len(bodies) == 2
+    latencies = sorted(r["latency_ms"] for r in records)
+    assert latencies[0] >= 50 and latencies[1] >= 95
+    assert wall >= 0.1
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from core import retrieval
+from core.fusion import rrf_fusion, weighted_fusion
+
+
+def _hit(cid: str, score: float = 0.0) -> dict:
+    return {"text": f"text {cid}", "score": score, "chunk_id": cid}
+
+
+def test_weighted_fusion_keys_by_chunk_id():
+    vector = [_hit("a"), _hit("b"), _hit("c")]
+    lexical = [_hit("c"), _hit("d")]
+    fused = weighted_fusion([vector, lexical], [[0.9, 0.5, 0.1], [10.0, 2.0]], [0.5, 0.5])
+    scores = {h["chunk_id"]: h["score"] for h in fused}
+    assert set(scores) == {"a", "b", "c", "d"}
+    # c: worst vector (0) + best lexical (1); a: best vector (1) + no lexical
+    assert scores["a"] == scores["c"] == 0.5
+    assert scores["d"] == 0.0
+    assert [h["chunk_id"] for h in fused][:2] in (["a", "c"], ["c", "a"])
+
+
+def test_rrf_fusion_rewards_agreement():
+    vector = [_hit("a"), _hit("b"), _hit("c")]
+    lexical = [_hit("b"), _hit("d")]
+    fused = rrf_fusion([vector, lexical], k=60)
+    assert [h["chunk_id"] for h in fused][0] == "b"
+    assert fused[0]["score"] == 1 / 62 + 1 / 61
+    assert {h["chunk_id"] for h in fused} == {"a", "b", "c", "d"}
+
+
+def test_hybrid_retrievers_run_concurrently(monkeypatch):
+    threads = {}
+
+    def fake_vector(requests):
+        threads["vector"] = threading.current_thread().name
+        time.sleep(0.2)
+        return [[_hit("a", 0.1), _hit("b", 0.4)] for _ in requests]
+
+    def fake_lexical(query, n, filters):
+        threads["lexical"] = threading.current_thread().name
+        time.sleep(0.2)
+        return [_hit("b", 3.0), _hit("c", 1.0)]
+
+    monkeypatch.setattr(retrieval, "_vector_candidates", fake_vector)
+    monkeypatch.setattr(retrieval, "_lexical_candidates", fake_lexical)
+    monkeypatch.setattr(retrieval.settings, "lexical_backend", "fts")
+
+    t0 = time.perf_counter()
+    results = retrieval.retrieve("q", top_k=3, hybrid=True, fusion="rrf")
+    elapsed = time.perf_counter() - t0
+
+    assert elapsed < 0.35
+    assert threads["lexical"].startswith("retrieval")
+    assert [r["chunk_id"] for r in results][0] == "b"
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import math
+
+from core.hash_embeddings import HashEmbeddings, HashReranker
+
+
+def test_hash_embeddings_are_deterministic_and_normalized():
+    emb = HashEmbeddings(64)
+    a = emb.embed_query("Postgres vector search")
+    assert a == HashEmbeddings(64).embed_documents(["postgres VECTOR search"])[0]
+    assert len(a) == 64
+    assert math.isclose(sum(v * v for v in a), 1.0)
+    assert emb.embed_query("") == [0.0] * 64
+
+
+def test_hash_reranker_prefers_overlapping_text():
+    scores = HashReranker(256).score(
+        "hybrid vector search", ["cooking pasta at home", "vector search with hybrid fusion"]
+    )
+    assert scores[1] > scores[0]
@@ -27,7 +27,7 @@ def test_hybrid_not_worse_hit_at_5(tmp_path):
         ("doc2.txt", b"This sample document mentions Markdown and PDF to test parsing searches."),
     ]
     for name, data in files:
-        r = client.post("/ingest", files={"file": (name, data, "text/plain")})
+        r = client.post("/ingest?wait=true", files={"file": (name, data, "text/plain")})
         assert r.status_code == 200
 
     fixtures_path = os.path.join("tests", "eval", "fixtures.yaml")
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+import app.routers.documents as documents_router
+import core.ingestion as ingestion
+from app.main import app
+from core.embedding_cache import content_hash
+from core.ingestion import DocumentConflict, diff_chunks
+from db.base import SessionLocal
+from db.models import Document
+
+
+def _stored(*texts):
+    return [SimpleNamespace(id=uuid.uuid4(), content_hash=content_hash(t)) for t in texts]
+
+
+def _chunks(*texts):
+    return [{"content": t, "page": 1, "meta": {}} for t in texts]
+
+
+def test_diff_keeps_unchanged_and_embeds_only_new():
+    stored = _stored("intro", "old middle", "outro")
+    kept, added, removed = diff_chunks(stored, _chunks("intro", "new middle", "outro"))
+    assert [row.id for row, _ in kept] == [stored[0].id, stored[2].id]
+    assert [c["content"] for c in added] == ["new middle"]
+    assert [row.id for row in removed] == [stored[1].id]
+
+
+def test_diff_matches_repeated_chunks_as_multiset():
+    stored = _stored("same", "same", "other")
+    kept, added, removed = diff_chunks(stored, _chunks("same", "same", "same"))
+    assert len(kept) == 2
+    assert [c["content"] for c in added] == ["same"]
+    assert [row.id for row in removed] == [stored[2].id]
+
+
+def test_put_maps_conflict_to_409(monkeypatch):
+    def fake_update(doc_id, raw, filename, kind, sha256):
+        raise DocumentConflict("Content already ingested as document x")
+
+    monkeypatch.setattr(documents_router, "update_document", fake_update)
+    client = TestClient(app)
+    r = client.put(f"/documents/{uuid.uuid4()}", files={"file": ("a.txt", b"hello", "text/plain")})
+    assert r.status_code == 409
+
+
+def test_delete_unknown_document_is_404(monkeypatch):
+    monkeypatch.setattr(documents_router, "delete_document", lambda doc_id: False)
+    client = TestClient(app)
+    assert client.delete(f"/documents/{uuid.uuid4()}").status_code == 404
+    assert client.delete("/documents/not-a-uuid").status_code == 404
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(
+    not os.getenv("DATABASE_URL", "").startswith("postgresql"), reason="Postgres required"
+)
+def test_update_racing_an_upload_of_the_same_content_is_a_conflict(monkeypatch):
+    original = f"Original version {uuid.uuid4()}.".encode()
+    revised = f"Revised version {uuid.uuid4()}.".encode()
+    sha = hashlib.sha256(revised).hexdigest()
+    doc = ingestion.ingest_bytes(original, "v1.txt", "txt", hashlib.sha256(original).hexdigest())
+    embed = ingestion.embed_chunks
+    raced = {}
+
+    def embed_while_upload_commits(texts):
+        # A concurrent /ingest of the new bytes commits after update_document's duplicate check
+        monkeypatch.setattr(ingestion, "embed_chunks", embed)
+        raced.update(ingestion.ingest_bytes(revised, "upload.txt", "txt", sha))
+        return embed(texts)
+
+    monkeypatch.setattr(ingestion, "embed_chunks", embed_while_upload_commits)
+    try:
+        with pytest.raises(DocumentConflict, match="already ingested"):
+            ingestion.update_document(uuid.UUID(doc["doc_id"]), revised, "v2.txt", "txt", sha)
+        with SessionLocal() as session:
+            assert ingestion.find_duplicate(session, sha)["doc_id"] == raced["doc_id"]
+            current = session.get(Document, uuid.UUID(doc["doc_id"]))
+            assert current.filename == "v1.txt" and current.meta["sha256"] != sha
+    finally:
+        with SessionLocal() as session:
+            ids = [uuid.UUID(d["doc_id"]) for d in (doc, raced) if d]
+            session.execute(delete(Document).where(Document.id.in_(ids)))
+            session.commit()
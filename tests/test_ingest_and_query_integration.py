@@ -23,7 +23,7 @@ def test_txt_ingest_and_query(tmp_path):
     sample.write_text("Python is a programming language. FastAPI is a Python framework.")
 
     with sample.open("rb") as f:
-        r = client.post("/ingest", files={"file": ("sample.txt", f, "text/plain")})
+        r = client.post("/ingest?wait=true", files={"file": ("sample.txt", f, "text/plain")})
     assert r.status_code == 200, r.text
     doc = r.json()["doc_id"]
     assert doc
@@ -52,7 +52,7 @@ def test_docx_ingest(tmp_path):
 
     with docx_path.open("rb") as f:
         r = client.post(
-            "/ingest",
+            "/ingest?wait=true",
             files={
                 "file": (
                     "sample.docx",
@@ -64,3 +64,15 @@ def test_docx_ingest(tmp_path):
     assert r.status_code == 200, r.text
     data = r.json()
     assert data["doc_id"]
+
+
+@pytest.mark.skipif(not require_postgres(), reason="Postgres required for integration test")
+def test_ingest_enqueues_job_and_reports_status():
+    client = TestClient(app)
+    r = client.post("/ingest", files={"file": ("job.txt", b"Queued ingest job test.", "text/plain")})
+    assert r.status_code == 202, r.text
+    job_id = r.json()["job_id"]
+
+    r = client.get(f"/ingest/jobs/{job_id}")
+    assert r.status_code == 200, r.text
+    assert r.json()["status"] in {"queued", "running", "succeeded"}
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete
+
+import core.jobs as jobs
+from db.base import SessionLocal
+from db.models import IngestJob
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(
+        not os.getenv("DATABASE_URL", "").startswith("postgresql"), reason="Postgres required"
+    ),
+]
+
+
+@pytest.fixture
+def job_id():
+    with SessionLocal() as session:
+        jid = jobs.enqueue_ingest(
+            session,
+            filename="job.txt",
+            kind="txt",
+            sha256=uuid.uuid4().hex * 2,
+            payload=f"Job payload {uuid.uuid4()}.".encode(),
+        )
+    yield jid
+    with SessionLocal() as session:
+        session.execute(delete(IngestJob).where(IngestJob.id == jid))
+        session.commit()
+
+
+def _abandon(job_id, attempts):
+    """The job looks like its worker died mid-attempt, past the lease."""
+    stale = jobs._now() - timedelta(seconds=jobs.settings.ingest_job_lease_seconds + 60)
+    jobs._update_job(job_id, status="running", attempts=attempts, locked_at=stale)
+
+
+def test_abandoned_job_is_reclaimed_while_attempts_remain(job_id):
+    _abandon(job_id, attempts=1)
+    assert jobs.claim_job(job_id) == job_id
+    assert jobs.get_job(job_id)["attempts"] == 2
+
+
+def test_abandoned_job_on_its_last_attempt_is_failed_not_rerun(job_id):
+    with SessionLocal() as session:
+        max_attempts = session.get(IngestJob, job_id).max_attempts
+    _abandon(job_id, attempts=max_attempts)
+    assert jobs.claim_job(job_id) is None
+    with SessionLocal() as session:
+        job = session.get(IngestJob, job_id)
+        assert (job.status, job.payload, job.attempts) == ("failed", None, max_attempts)
+        assert "Worker lost the job" in job.error
+
+
+def test_lease_is_renewed_during_a_long_stage(job_id, monkeypatch):
+    monkeypatch.setattr(jobs.settings, "ingest_job_lease_seconds", 3)
+    in_stage, release = threading.Event(), threading.Event()
+
+    def slow_ingest(raw, filename, kind, sha256, on_stage):
+        on_stage("embedding")
+        in_stage.set()
+        release.wait(10)
+        return {"doc_id": str(uuid.uuid4()), "stats": {}}
+
+    monkeypatch.setattr(jobs, "ingest_bytes", slow_ingest)
+    assert jobs.claim_job(job_id) == job_id
+    worker = threading.Thread(target=jobs.run_job, args=(job_id,))
+    worker.start()
+    try:
+        assert in_stage.wait(10)
+        # Longer than the lease with no stage change: only the heartbeat keeps it claimed
+        threading.Event().wait(4.5)
+        assert jobs.claim_job(job_id) is None
+    finally:
+        release.set()
+        worker.join(10)
+    job = jobs.get_job(job_id)
+    assert job["status"] == "succeeded" and job["attempts"] == 1
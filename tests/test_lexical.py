@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+import random
+import string
+
+import pytest
+from sqlalchemy import delete
+
+from core.embedding_cache import content_hash
+from core.lexical import search_fulltext
+from db.base import SessionLocal
+from db.models import Chunk, Document
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(
+        not os.getenv("DATABASE_URL", "").startswith("postgresql"), reason="Postgres required"
+    ),
+]
+
+
+@pytest.fixture
+def corpus():
+    # A made-up term keeps the test independent of whatever else is in the database
+    term = "".join(random.choices(string.ascii_lowercase, k=12))
+    texts = [
+        (f"The {term} index tunes {term} recall with {term} probes.", "pdf", "Tuning"),
+        (f"One {term} mention in a paragraph about something else entirely.", "txt", None),
+        ("Nothing relevant here.", "txt", None),
+    ]
+    with SessionLocal() as session:
+        docs = [Document(filename=f"fts-{term}-{i}.txt", meta={}) for i in range(2)]
+        session.add_all(docs)
+        session.flush()
+        chunks = [
+            Chunk(
+                document_id=docs[min(i, 1)].id,
+                content=content,
+                content_hash=content_hash(content),
+                page=1,
+                meta={"source": source},
+                source=source,
+                section=section,
+            )
+            for i, (content, source, section) in enumerate(texts)
+        ]
+        session.add_all(chunks)
+        session.commit()
+        ids = {
+            "term": term,
+            "docs": [str(d.id) for d in docs],
+            "chunks": [str(c.id) for c in chunks],
+        }
+    yield ids
+    with SessionLocal() as session:
+        # chunks go with their documents (ON DELETE CASCADE)
+        session.execute(delete(Document).where(Document.id.in_([d.id for d in docs])))
+        session.commit()
+
+
+def test_ranks_by_term_density_in_postgres(corpus):
+    results = search_fulltext(corpus["term"], k=10)
+    assert [r["chunk_id"] for r in results] == corpus["chunks"][:2]
+    assert results[0]["score"] > results[1]["score"] > 0
+    assert results[0]["source"] == "pdf" and results[0]["section"] == "Tuning"
+
+
+def test_filters_apply_before_the_limit(corpus):
+    by_source = search_fulltext(corpus["term"], k=1, filters={"source": "txt"})
+    assert [r["chunk_id"] for r in by_source] == [corpus["chunks"][1]]
+    by_doc = search_fulltext(corpus["term"], k=10, filters={"doc_id": corpus["docs"][0]})
+    assert [r["chunk_id"] for r in by_doc] == [corpus["chunks"][0]]
+    assert search_fulltext(corpus["term"], k=10, filters={"section": "Missing"}) == []
+
+
+def test_websearch_syntax_and_stemming(corpus):
+    # Stemmed match ("probe" ~ "probes") AND-ed with the term; "-index" excludes the first chunk
+    assert [r["chunk_id"] for r in search_fulltext(f"{corpus['term']} probe", k=10)] == [
+        corpus["chunks"][0]
+    ]
+    assert [r["chunk_id"] for r in search_fulltext(f"{corpus['term']} -index", k=10)] == [
+        corpus["chunks"][1]
+    ]
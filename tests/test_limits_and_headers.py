@@ -26,6 +26,12 @@ def test_415_on_unsupported_content_type(tmp_path):
     assert r.status_code == 415
 
 
+def test_unknown_ingest_job_returns_404():
+    client = TestClient(app)
+    r = client.get("/ingest/jobs/not-a-uuid")
+    assert r.status_code == 404
+
+
 def test_x_request_id_header_present():
     client = TestClient(app)
     r = client.post("/query", json={"query": "ping", "top_k": 1})
@@ -21,3 +21,7 @@ def test_metrics_endpoint_available():
         )
         # Custom counter present
         assert "rag_rerank_timeouts_total" in body
+        # Connection pool utilization
+        assert "rag_db_pool_connections" in body
+        # Per-stage latency histogram
+        assert "rag_stage_duration_seconds" in body
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from core import embeddings as embeddings_mod
+from core.onnx_embeddings import OnnxBgeEmbeddings, cls_pool
+
+
+def test_cls_pool_takes_first_token_and_normalizes():
+    hidden = np.zeros((2, 3, 4), dtype=np.float32)
+    hidden[0, 0] = [3.0, 4.0, 0.0, 0.0]
+    hidden[1, 0] = [0.0, 0.0, 0.0, 2.0]
+    hidden[:, 1:] = 9.0  # non-CLS tokens are ignored
+    pooled = cls_pool(hidden)
+    assert np.allclose(pooled[0], [0.6, 0.8, 0.0, 0.0])
+    assert np.allclose(pooled[1], [0.0, 0.0, 0.0, 1.0])
+
+
+def test_model_id_separates_backends(monkeypatch):
+    s = embeddings_mod.settings
+    monkeypatch.setattr(s, "embedding_model", "BAAI/bge-small-en-v1.5")
+    monkeypatch.setattr(s, "embedding_backend", "torch")
+    assert embeddings_mod.embedding_model_id() == "BAAI/bge-small-en-v1.5"
+    monkeypatch.setattr(s, "embedding_backend", "onnx")
+    monkeypatch.setattr(s, "onnx_quantize", True)
+    assert embeddings_mod.embedding_model_id() == "BAAI/bge-small-en-v1.5#onnx-int8"
+    monkeypatch.setattr(s, "onnx_quantize", False)
+    assert embeddings_mod.embedding_model_id() == "BAAI/bge-small-en-v1.5#onnx"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        embeddings_mod.build_embeddings("tensorflow")
+
+
+class FakeEncoding:
+    def __init__(self, ids, pad_to):
+        pad = pad_to - len(ids)
+        self.ids = ids + [0] * pad
+        self.attention_mask = [1] * len(ids) + [0] * pad
+        self.type_ids = [0] * pad_to
+
+
+class FakeTokenizer:
+    def __init__(self):
+        self.seen = []
+
+    @classmethod
+    def from_file(cls, path):
+        return cls()
+
+    def enable_truncation(self, max_length):
+        self.max_length = max_length
+
+    def enable_padding(self):
+        pass
+
+    def encode_batch(self, texts):
+        self.seen.extend(texts)
+        ids = [[101] + [len(w) for w in t.split()][: self.max_length - 1] for t in texts]
+        width = max(len(i) for i in ids)
+        return [FakeEncoding(i, width) for i in ids]
+
+
+class FakeSession:
+    """Model without token_type_ids; the CLS state is (sequence length, sum of ids, 0, 0)."""
+
+    def __init__(self, path, sess_options=None, providers=None):
+        self.path = path
+        self.runs = []
+
+    def get_inputs(self):
+        return [
+            types.SimpleNamespace(name="input_ids"),
+            types.SimpleNamespace(name="attention_mask"),
+        ]
+
+    def run(self, output_names, feeds):
+        assert output_names == ["last_hidden_state"]
+        self.runs.append(feeds)
+        ids, mask = feeds["input_ids"], feeds["attention_mask"]
+        hidden = np.ones((ids.shape[0], ids.shape[1], 4), dtype=np.float32)
+        hidden[:, 0, 0] = mask.sum(axis=1)
+        hidden[:, 0, 1] = ids.sum(axis=1)
+        hidden[:, 0, 2:] = 0.0
+        return [hidden]
+
+
+@pytest.fixture
+def onnx_embeddings(monkeypatch):
+    ort = types.ModuleType("onnxruntime")
+    ort.SessionOptions = types.SimpleNamespace
+    ort.GraphOptimizationLevel = types.SimpleNamespace(ORT_ENABLE_ALL="all")
+    ort.InferenceSession = FakeSession
+    tokenizers = types.ModuleType("tokenizers")
+    tokenizers.Tokenizer = FakeTokenizer
+    monkeypatch.setitem(sys.modules, "onnxruntime", ort)
+    monkeypatch.setitem(sys.modules, "tokenizers", tokenizers)
+    return OnnxBgeEmbeddings(
+        "/models/bge", quantize=False, batch_size=2, max_length=3, query_instruction="q: "
+    )
+
+
+def test_onnx_embeddings_tokenize_run_pool_and_normalize(onnx_embeddings):
+    emb = onnx_embeddings
+    assert emb._session.path.endswith("model.onnx")
+    vectors = emb.embed_documents(["abc", "ab\ncd", "a b c d e"])
+    assert len(vectors) == 3 and all(len(v) == 4 for v in vectors)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    # Batches of two, padded per batch; inputs the model does not declare are dropped
+    assert [f["input_ids"].shape for f in emb._session.runs] == [(2, 3), (1, 3)]
+    assert all(set(f) == {"input_ids", "attention_mask"} for f in emb._session.runs)
+    assert all(f["input_ids"].dtype == np.int64 for f in emb._session.runs)
+    # CLS state before normalization: (tokens, sum of ids); truncated to max_length
+    cls = np.array([[2.0, 104.0], [3.0, 105.0], [3.0, 103.0]])
+    assert np.allclose(np.array(vectors)[:, :2], cls / np.linalg.norm(cls, axis=1, keepdims=True))
+    assert emb._tokenizer.seen[1] == "ab cd"
+
+
+def test_onnx_embed_query_prepends_instruction(onnx_embeddings):
+    vector = onnx_embeddings.embed_query("what\nis bge")
+    assert onnx_embeddings._tokenizer.seen == ["q: what is bge"]
+    assert len(vector) == 4 and np.isclose(np.linalg.norm(vector), 1.0)
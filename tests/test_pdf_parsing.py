@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+import fitz
+import pytest
+
+from core.parsing import pdf
+from core.parsing.pdf import PdfParseTimeout, parse_pdf
+
+
+def _pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Content of page {i + 1}")
+    return doc.tobytes()
+
+
+def test_parse_pdf_keeps_page_numbers_without_a_pool(monkeypatch):
+    monkeypatch.setattr(pdf.settings, "pdf_parse_workers", 0)
+    pages = parse_pdf(_pdf(3))
+    assert [p["page"] for p in pages] == [1, 2, 3]
+    assert "Content of page 2" in pages[1]["content"]
+    assert pages[0]["meta"] == {"source": "pdf"}
+
+
+def test_parse_pdf_fans_out_page_ranges(monkeypatch):
+    monkeypatch.setattr(pdf.settings, "pdf_parse_workers", 2)
+    monkeypatch.setattr(pdf.settings, "pdf_pages_per_task", 2)
+    pages = parse_pdf(_pdf(5))
+    assert [p["page"] for p in pages] == [1, 2, 3, 4, 5]
+    for p in pages:
+        assert f"Content of page {p['page']}" in p["content"]
+
+
+def test_timeout_kills_running_workers_before_removing_the_file(monkeypatch):
+    monkeypatch.setattr(pdf.settings, "pdf_parse_workers", 2)
+    monkeypatch.setattr(pdf.settings, "pdf_pages_per_task", 32)
+    # Shorter than spawning a worker: the single-range document is still running
+    monkeypatch.setattr(pdf.settings, "pdf_parse_timeout_seconds", 0.01)
+    paths, pools, workers = [], [], []
+    mkstemp, get_pool, terminate = tempfile.mkstemp, pdf._get_pool, pdf._terminate
+
+    def recording_mkstemp(*args, **kwargs):
+        fd, path = mkstemp(*args, **kwargs)
+        paths.append(path)
+        return fd, path
+
+    def recording_get_pool():
+        pools.append(get_pool())
+        return pools[-1]
+
+    def recording_terminate(pool):
+        workers.extend(pool._processes.values())
+        terminate(pool)
+
+    monkeypatch.setattr(pdf.tempfile, "mkstemp", recording_mkstemp)
+    monkeypatch.setattr(pdf, "_terminate", recording_terminate)
+    monkeypatch.setattr(pdf, "_get_pool", recording_get_pool)
+    with pytest.raises(PdfParseTimeout):
+        parse_pdf(_pdf(3))
+
+    assert workers and all(not p.is_alive() for p in workers)
+    assert not os.path.exists(paths[0])
+    # The killed pool is replaced on the next parse
+    monkeypatch.setattr(pdf.settings, "pdf_parse_timeout_seconds", 60)
+    assert [p["page"] for p in parse_pdf(_pdf(2))] == [1, 2]
+    assert pools[1] is not pools[0]
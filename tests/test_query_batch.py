@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+import app.routers.query as query_router
+import core.result_cache as result_cache
+from app.main import app
+
+
+def test_query_batch_returns_results_in_order(monkeypatch):
+    seen = []
+
+    def fake_retrieve_many(requests):
+        seen.append(requests)
+        return [
+            [{"text": r.query, "score": 1.0, "chunk_id": str(i)}] for i, r in enumerate(requests)
+        ]
+
+    monkeypatch.setattr(result_cache, "retrieve_many", fake_retrieve_many)
+    monkeypatch.setattr(result_cache.settings, "result_cache_size", 0)
+    client = TestClient(app)
+    r = client.post(
+        "/query/batch",
+        json={"queries": [{"query": "first", "top_k": 3}, {"query": "second", "source": "pdf"}]},
+    )
+    assert r.status_code == 200
+    assert [res["results"][0]["text"] for res in r.json()["results"]] == ["first", "second"]
+    (requests,) = seen
+    assert requests[0].top_k == 3 and requests[0].filters is None
+    assert requests[1].filters == {"source": "pdf"}
+
+
+def test_query_batch_rejects_oversized_batches(monkeypatch):
+    monkeypatch.setattr(query_router.settings, "query_batch_max", 1)
+    client = TestClient(app)
+    r = client.post("/query/batch", json={"queries": [{"query": "a"}, {"query": "b"}]})
+    assert r.status_code == 413
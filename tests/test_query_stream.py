@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+import app.routers.query as query_router
+from app.main import app
+
+
+def _setup(monkeypatch, rerank_ok: bool):
+    def fake_first_pass(requests):
+        return [[{"text": t, "score": s} for t, s in (("a", 0.9), ("b", 0.5), ("c", 0.1))]]
+
+    def fake_rerank(query, results):
+        if not rerank_ok:
+            return False
+        results.reverse()
+        return True
+
+    monkeypatch.setattr(query_router, "first_pass_many", fake_first_pass)
+    monkeypatch.setattr(query_router, "rerank_results", fake_rerank)
+    monkeypatch.setattr(query_router.settings, "result_cache_size", 0)
+
+
+def _events(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_stream_emits_first_pass_then_reranked(monkeypatch):
+    _setup(monkeypatch, rerank_ok=True)
+    client = TestClient(app)
+    r = client.post("/query/stream", json={"query": "q", "top_k": 2, "rerank": True})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    first, final = _events(r)
+    assert first["event"] == "first_pass"
+    assert [x["text"] for x in first["results"]] == ["a", "b"]
+    assert final["event"] == "final" and final["reranked"] is True
+    assert [x["text"] for x in final["results"]] == ["c", "b"]
+
+
+def test_stream_final_falls_back_when_rerank_times_out(monkeypatch):
+    _setup(monkeypatch, rerank_ok=False)
+    client = TestClient(app)
+    events = _events(client.post("/query/stream", json={"query": "q", "top_k": 2, "rerank": True}))
+    assert [e["event"] for e in events] == ["first_pass", "final"]
+    assert events[1]["reranked"] is False
+    assert events[1]["results"] == events[0]["results"]
+
+
+def test_stream_without_rerank_sends_only_final(monkeypatch):
+    _setup(monkeypatch, rerank_ok=True)
+    client = TestClient(app)
+    events = _events(client.post("/query/stream", json={"query": "q", "top_k": 3}))
+    assert [e["event"] for e in events] == ["final"]
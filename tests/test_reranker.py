@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import sys
+import types
+
+import core.reranker as reranker_mod
+
+
+class FakeCrossEncoder:
+    instances = 0
+
+    def __init__(self, model_name, max_length=None):
+        FakeCrossEncoder.instances += 1
+        self.max_length = max_length
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append((len(pairs), batch_size))
+        return [float(len(t)) for _, t in pairs]
+
+
+def test_reranker_loaded_once_and_batched(monkeypatch):
+    fake = types.ModuleType("sentence_transformers")
+    fake.CrossEncoder = FakeCrossEncoder
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake)
+    monkeypatch.setattr(reranker_mod, "_reranker", None)
+    monkeypatch.setattr(reranker_mod.settings, "rerank_batch_size", 4)
+    monkeypatch.setattr(reranker_mod.settings, "rerank_max_length", 128)
+    FakeCrossEncoder.instances = 0
+
+    r1 = reranker_mod.get_reranker()
+    r2 = reranker_mod.get_reranker()
+    assert r1 is r2
+    assert FakeCrossEncoder.instances == 1
+    assert r1.model.max_length == 128
+
+    assert r1.score("q", ["a", "bbb"]) == [1.0, 3.0]
+    assert r1.score("q", []) == []
+    assert r1.model.calls == [(2, 4)]
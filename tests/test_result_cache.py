@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import types
+
+import core.corpus as corpus
+import core.result_cache as result_cache
+from core.cache import TTLCache
+from core.retrieval import RetrievalRequest
+
+
+def _setup(monkeypatch):
+    state = {"generation": 1, "calls": [], "rerank_ok": True}
+
+    def fake_first_pass(requests):
+        state["calls"].append([r.query for r in requests])
+        return [[{"text": r.query, "score": 1.0}] for r in requests]
+
+    monkeypatch.setattr(result_cache, "first_pass_many", fake_first_pass)
+    monkeypatch.setattr(result_cache, "rerank_results", lambda q, r: state["rerank_ok"])
+    monkeypatch.setattr(result_cache, "corpus_generation", lambda: state["generation"])
+    monkeypatch.setattr(result_cache, "_results", TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(result_cache.settings, "result_cache_size", 16)
+    return state
+
+
+def test_identical_normalized_requests_hit_cache(monkeypatch):
+    state = _setup(monkeypatch)
+    first = result_cache.retrieve_many_cached([RetrievalRequest("what is  FastAPI", 5)])
+    second = result_cache.retrieve_many_cached([RetrievalRequest(" what is FastAPI ", 5)])
+    assert first == second
+    assert state["calls"] == [["what is  FastAPI"]]
+
+    # Any parameter that changes results is part of the key
+    result_cache.retrieve_many_cached([RetrievalRequest("what is FastAPI", 3)])
+    result_cache.retrieve_many_cached([RetrievalRequest("what is FastAPI", 5, rerank=True)])
+    assert len(state["calls"]) == 3
+
+
+def test_generation_bump_and_bypass_skip_cache(monkeypatch):
+    state = _setup(monkeypatch)
+    req = RetrievalRequest("q", 5, filters={"source": "pdf"})
+    result_cache.retrieve_many_cached([req])
+    state["generation"] = 2
+    result_cache.retrieve_many_cached([req])
+    result_cache.retrieve_many_cached([req], [False])
+    assert len(state["calls"]) == 3
+
+
+def test_batch_only_retrieves_misses(monkeypatch):
+    state = _setup(monkeypatch)
+    result_cache.retrieve_many_cached([RetrievalRequest("a", 5)])
+    out = result_cache.retrieve_many_cached([RetrievalRequest(q, 5) for q in ("a", "b", "c")])
+    assert [r[0]["text"] for r in out] == ["a", "b", "c"]
+    assert state["calls"] == [["a"], ["b", "c"]]
+
+
+def test_failed_rerank_is_not_cached(monkeypatch):
+    state = _setup(monkeypatch)
+    state["rerank_ok"] = False
+    req = RetrievalRequest("q", 5, rerank=True)
+    result_cache.retrieve_many_cached([req])
+    state["rerank_ok"] = True
+    result_cache.retrieve_many_cached([req])
+    result_cache.retrieve_many_cached([req])
+    assert len(state["calls"]) == 2
+
+
+class _SlowReadSession:
+    """Session whose generation read finishes after another thread bumped to `bumped`."""
+
+    def __init__(self, read, bumped):
+        self.read, self.bumped = read, bumped
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt):
+        corpus._remember(self.bumped)
+        return types.SimpleNamespace(scalar_one_or_none=lambda: self.read)
+
+
+def test_stale_generation_read_does_not_roll_back_a_bump(monkeypatch):
+    monkeypatch.setattr(corpus, "_generation", None)
+    monkeypatch.setattr(corpus, "SessionLocal", lambda: _SlowReadSession(read=5, bumped=6))
+    assert corpus.corpus_generation() == 6
+    assert corpus._generation == 6
+    monkeypatch.setattr(corpus, "_generation", None)
+    monkeypatch.setattr(corpus, "SessionLocal", lambda: _SlowReadSession(read=7, bumped=6))
+    assert corpus.corpus_generation() == 7
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+import app.routers.query as query_router
+import core.metrics as metrics
+import core.result_cache as result_cache
+import core.retrieval as retrieval
+from app.main import app
+from core.metrics import StageTimings, observe_stage, stage_timings_ctx, timed
+
+
+def test_timed_accumulates_into_request_timings():
+    timings = StageTimings()
+    token = stage_timings_ctx.set(timings)
+    try:
+        with timed("rerank"):
+            pass
+        observe_stage("rerank", 0.5)
+        observe_stage("fusion", 0.25)
+    finally:
+        stage_timings_ctx.reset(token)
+    assert set(timings.durations) == {"rerank", "fusion"}
+    assert timings.durations["rerank"] >= 0.5
+    # Outside a request nothing is collected
+    observe_stage("rerank", 1.0)
+    assert timings.durations["fusion"] == 0.25
+
+
+def test_server_timing_header_reports_stages_from_query_pool(monkeypatch):
+    def fake_retrieve_many(requests):
+        observe_stage("vector_search", 0.012)
+        return [[] for _ in requests]
+
+    monkeypatch.setattr(result_cache, "retrieve_many", fake_retrieve_many)
+    monkeypatch.setattr(result_cache.settings, "result_cache_size", 0)
+    monkeypatch.setattr(query_router.settings, "server_timing", True)
+    client = TestClient(app)
+    r = client.post("/query", json={"query": "q"})
+    assert r.status_code == 200
+    header = r.headers["Server-Timing"]
+    assert "vector_search;dur=12.0" in header
+    assert "total;dur=" in header
+
+
+def test_hybrid_query_records_one_lexical_stage(monkeypatch):
+    stages = []
+    monkeypatch.setattr(metrics, "observe_stage", lambda stage, seconds: stages.append(stage))
+    monkeypatch.setattr(retrieval.settings, "lexical_backend", "bm25")
+    monkeypatch.setattr(retrieval, "_bm25_candidates", lambda query, n, filters: [])
+    monkeypatch.setattr(retrieval, "_vector_candidates", lambda requests: [[] for _ in requests])
+    monkeypatch.setattr(retrieval, "_with_bm25_scores", lambda query, lexical, vector: lexical)
+
+    retrieval.first_pass_many([retrieval.RetrievalRequest(query="q", top_k=5, hybrid=True)])
+    assert stages.count("lexical") == 1
+    assert stages.count("bm25_rescore") == 1
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import app.routers.ingest as ingest_router
+from app.main import UploadSizeLimit, app
+
+
+def test_upload_past_limit_is_rejected_while_streaming(monkeypatch):
+    monkeypatch.setattr(ingest_router.settings, "max_upload_mb", 0)
+    sent = []
+
+    async def receive():
+        sent.append(1)
+        return {"type": "http.request", "body": b"x" * 16 * 1024, "more_body": len(sent) < 64}
+
+    async def inner(scope, receive, send):
+        # Stand-in for multipart parsing: consume the whole body
+        while (await receive()).get("more_body"):
+            pass
+
+    scope = {"type": "http", "path": "/ingest"}
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(UploadSizeLimit(inner)(scope, receive, None))
+    assert exc.value.status_code == 413
+    # Aborted after the overhead allowance, well before the 1 MB body was received
+    assert len(sent) < 64
+
+
+def test_upload_over_limit_is_413_before_dedupe(monkeypatch):
+    monkeypatch.setattr(ingest_router.settings, "max_upload_mb", 0)
+    client = TestClient(app)
+    r = client.post("/ingest", files={"file": ("big.txt", b"x" * 1024, "text/plain")})
+    assert r.status_code == 413
+
+
+def test_duplicate_is_answered_from_streamed_hash(monkeypatch):
+    data = b"hello world\n" * 10_000
+    seen = {}
+
+    def fake_find_duplicate(session, sha256):
+        seen["sha256"] = sha256
+        return {"doc_id": "existing", "stats": {"chunks": 3, "tokens": 30}}
+
+    def fail_enqueue(*args, **kwargs):
+        raise AssertionError("duplicate must not be enqueued")
+
+    monkeypatch.setattr(ingest_router, "HASH_CHUNK_BYTES", 4096)
+    monkeypatch.setattr(ingest_router, "find_duplicate", fake_find_duplicate)
+    monkeypatch.setattr(ingest_router, "enqueue_ingest", fail_enqueue)
+    client = TestClient(app)
+    r = client.post("/ingest", files={"file": ("a.txt", data, "text/plain")})
+    assert r.status_code == 200
+    assert r.json()["doc_id"] == "existing"
+    assert seen["sha256"] == hashlib.sha256(data).hexdigest()
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+import core.vectorstore as vs
+
+
+def test_filters_map_to_typed_columns():
+    doc_id = uuid.uuid4()
+    clauses, params = vs.chunk_filter_sql({"doc_id": str(doc_id), "source": "pdf", "section": None})
+    assert clauses == ["c.document_id = :f_doc_id", "c.source = :f_source"]
+    assert params == {"f_doc_id": doc_id, "f_source": "pdf"}
+
+
+def test_invalid_doc_id_matches_nothing():
+    assert vs.chunk_filter_sql({"doc_id": "not-a-uuid"}) is None
+
+
+def test_unknown_filter_is_rejected():
+    with pytest.raises(ValueError):
+        vs.chunk_filter_sql({"meta": "x"})
+
+
+@pytest.mark.parametrize(
+    "clauses,rows,plan",
+    [
+        ([], None, "ann"),
+        (["c.source = :f_source"], 10, "exact"),
+        (["c.source = :f_source"], 100, "exact"),
+        (["c.source = :f_source"], 101, "filtered_ann"),
+    ],
+)
+def test_plan_by_filtered_set_size(monkeypatch, clauses, rows, plan):
+    monkeypatch.setattr(vs.settings, "exact_search_max_rows", 100)
+
+    def fake_rows(conn, clauses, params):
+        assert rows is not None, "unfiltered searches must not count rows"
+        return rows
+
+    monkeypatch.setattr(vs, "_filtered_rows", fake_rows)
+    assert vs.plan_search(None, clauses, {}) == plan